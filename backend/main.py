@@ -2,15 +2,16 @@
 OpenRide FastAPI Backend Application
 Main entry point for the API
 """
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 import uvicorn
 
-from src.config.database import init_db
-from src.config.settings import get_settings
+from src.config.database import async_engine, init_db
+from src.config.settings import Settings, get_settings
+from src.utils.interswitch import close_http_client
 from src.middleware.error_handler import (
     OpenRideException,
     openride_exception_handler,
@@ -36,16 +37,20 @@ app = FastAPI(
     description="OpenRide - Community-powered micro-ridesharing platform for daily work commutes",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS
+# Configure CORS (pure ASGI middleware - keep this the only add_middleware call
+# and avoid BaseHTTPMiddleware for anything added here later)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    # Explicit lists let Starlette answer preflights with a set lookup
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "Accept", "If-None-Match"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # Booking list pagination, conditional GETs
 )
 
 # Register exception handlers
@@ -55,26 +60,36 @@ app.add_exception_handler(SQLAlchemyError, database_exception_handler)
 app.add_exception_handler(Exception, general_exception_handler)
 
 # Register routers
-app.include_router(auth_router)
-app.include_router(route_router)
-app.include_router(booking_router)
-app.include_router(payment_router)
-app.include_router(vehicle_router)
+ROUTERS = [auth_router, route_router, booking_router, payment_router, vehicle_router]
+
+for router in ROUTERS:
+    app.include_router(router)
 
 
 @app.on_event("startup")
 async def startup_event():
     """
-    Initialize database on startup
+    Initialize database on startup (skipped when AUTO_MIGRATE is off,
+    e.g. multi-worker deployments that run migrate.py once beforehand)
     """
     print("🚀 Starting OpenRide API...")
-    print(f"📊 Initializing database...")
-    init_db()
-    print("✅ Database initialized successfully")
+    if settings.AUTO_MIGRATE:
+        print(f"📊 Initializing database...")
+        init_db()
+        print("✅ Database initialized successfully")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Close pooled database and Interswitch connections
+    """
+    await async_engine.dispose()
+    await close_http_client()
 
 
 @app.get("/")
-async def root():
+async def root(settings: Settings = Depends(get_settings)):
     """
     Root endpoint - API health check
     """
@@ -87,7 +102,7 @@ async def root():
 
 
 @app.get("/api/health")
-async def health_check():
+async def health_check(settings: Settings = Depends(get_settings)):
     """
     Health check endpoint
     """
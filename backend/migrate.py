@@ -0,0 +1,26 @@
+"""
+One-shot schema migration for OpenRide
+
+Creates any missing tables. Run this once before starting the API
+(especially when serving with multiple workers) and set AUTO_MIGRATE=False
+so the workers don't each race to run DDL at startup:
+    python migrate.py
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+sys.path.append(str(Path(__file__).parent))
+
+from src.config.database import init_db
+import src.models  # noqa: F401 - registers all tables on Base.metadata
+
+
+def main():
+    print("📊 Running database migrations...")
+    init_db()
+    print("✅ Database schema is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 from datetime import datetime, timedelta
+from sqlalchemy import delete, insert, text
 from src.config.database import SessionLocal, init_db
 from src.models.user import User, UserRole
 from src.models.vehicle import Vehicle
@@ -26,10 +27,13 @@ from src.utils.auth import hash_password
 def clear_database(db):
     """Clear existing data for fresh demo"""
     print("🗑️  Clearing existing demo data...")
-    db.query(Route).delete()
-    db.query(Vehicle).delete()
-    db.query(User).delete()
-    db.commit()
+    if db.bind.dialect.name == "postgresql":
+        db.execute(text("TRUNCATE routes, vehicles, users RESTART IDENTITY CASCADE"))
+    else:
+        db.execute(delete(Route))
+        db.execute(delete(Vehicle))
+        db.execute(delete(User))
+    # Committed together with the inserts in main()
     print("✅ Database cleared")
 
 def create_test_users(db):
@@ -41,54 +45,57 @@ def create_test_users(db):
     
     users = [
         # Riders
-        User(
+        dict(
             email="rider@demo.com",
-            password=test_password,
+            password_hash=test_password,
             name="Demo Rider",
             phone="08012345678",
             role=UserRole.RIDER
         ),
-        User(
+        dict(
             email="john@test.com",
-            password=test_password,
+            password_hash=test_password,
             name="John Doe",
             phone="08023456789",
             role=UserRole.RIDER
         ),
-        User(
+        dict(
             email="sarah@test.com",
-            password=test_password,
+            password_hash=test_password,
             name="Sarah Williams",
             phone="08034567890",
             role=UserRole.RIDER
         ),
         
         # Drivers
-        User(
+        dict(
             email="driver@demo.com",
-            password=test_password,
+            password_hash=test_password,
             name="Demo Driver",
             phone="08087654321",
             role=UserRole.DRIVER
         ),
-        User(
+        dict(
             email="mike@driver.com",
-            password=test_password,
+            password_hash=test_password,
             name="Mike Johnson",
             phone="08076543210",
             role=UserRole.DRIVER
         ),
-        User(
+        dict(
             email="ada@driver.com",
-            password=test_password,
+            password_hash=test_password,
             name="Ada Okafor",
             phone="08065432109",
             role=UserRole.DRIVER
         ),
     ]
     
-    db.add_all(users)
-    db.commit()
+    # Single bulk INSERT ... RETURNING instead of per-object unit of work
+    users = db.execute(
+        insert(User).returning(User.id, User.email, User.role, sort_by_parameter_order=True),
+        users
+    ).all()
     
     print(f"✅ Created {len(users)} test users:")
     print("\n   RIDERS (Login with these):")
@@ -107,37 +114,39 @@ def create_test_vehicles(db, drivers):
     print("\n🚗 Creating test vehicles...")
     
     vehicles = [
-        Vehicle(
-            driver_id=drivers[0].id,  # Demo Driver
+        dict(
+            user_id=drivers[0].id,  # Demo Driver
             make="Toyota",
             model="Hiace",
             year=2020,
             color="White",
             plate_number="LAG-123-XY",
-            capacity=14
+            total_seats=14
         ),
-        Vehicle(
-            driver_id=drivers[1].id,  # Mike Johnson
+        dict(
+            user_id=drivers[1].id,  # Mike Johnson
             make="Toyota",
             model="Corolla",
             year=2019,
             color="Silver",
             plate_number="ABJ-456-ZZ",
-            capacity=4
+            total_seats=4
         ),
-        Vehicle(
-            driver_id=drivers[2].id,  # Ada Okafor
+        dict(
+            user_id=drivers[2].id,  # Ada Okafor
             make="Honda",
             model="Civic",
             year=2021,
             color="Black",
             plate_number="LAG-789-AB",
-            capacity=4
+            total_seats=4
         ),
     ]
     
-    db.add_all(vehicles)
-    db.commit()
+    vehicles = db.execute(
+        insert(Vehicle).returning(Vehicle.id, sort_by_parameter_order=True),
+        vehicles
+    ).all()
     
     print(f"✅ Created {len(vehicles)} vehicles")
     return vehicles
@@ -146,11 +155,11 @@ def create_test_routes(db, drivers, vehicles):
     """Create active routes for demonstration"""
     print("\n🛣️  Creating test routes...")
     
-    tomorrow = datetime.now().date() + timedelta(days=1)
+    tomorrow = datetime.combine(datetime.now().date() + timedelta(days=1), datetime.min.time())
     
     routes = [
         # Route 1: Popular mainland route
-        Route(
+        dict(
             driver_id=drivers[0].id,
             vehicle_id=vehicles[0].id,
             start_location="Ikeja",
@@ -159,13 +168,12 @@ def create_test_routes(db, drivers, vehicles):
             departure_time="08:00",
             price_per_seat=1500.00,
             available_seats=12,
-            total_seats=14,
             status=RouteStatus.ACTIVE,
             bus_stops=["Ikeja", "Oshodi", "Obalende", "VI"]
         ),
         
         # Route 2: Island route
-        Route(
+        dict(
             driver_id=drivers[0].id,
             vehicle_id=vehicles[0].id,
             start_location="Lekki",
@@ -174,13 +182,12 @@ def create_test_routes(db, drivers, vehicles):
             departure_time="09:00",
             price_per_seat=1200.00,
             available_seats=10,
-            total_seats=14,
             status=RouteStatus.ACTIVE,
             bus_stops=["Lekki", "Ajah", "Ikoyi", "Marina"]
         ),
         
         # Route 3: Morning commute
-        Route(
+        dict(
             driver_id=drivers[1].id,
             vehicle_id=vehicles[1].id,
             start_location="Surulere",
@@ -189,13 +196,12 @@ def create_test_routes(db, drivers, vehicles):
             departure_time="07:30",
             price_per_seat=800.00,
             available_seats=3,
-            total_seats=4,
             status=RouteStatus.ACTIVE,
             bus_stops=["Surulere", "Yaba"]
         ),
         
         # Route 4: Cross-town route
-        Route(
+        dict(
             driver_id=drivers[1].id,
             vehicle_id=vehicles[1].id,
             start_location="Ogba",
@@ -204,13 +210,12 @@ def create_test_routes(db, drivers, vehicles):
             departure_time="10:00",
             price_per_seat=2000.00,
             available_seats=4,
-            total_seats=4,
             status=RouteStatus.ACTIVE,
             bus_stops=["Ogba", "Ikeja", "Obalende", "Ikoyi", "Lekki"]
         ),
         
         # Route 5: Evening route
-        Route(
+        dict(
             driver_id=drivers[2].id,
             vehicle_id=vehicles[2].id,
             start_location="VI",
@@ -219,13 +224,12 @@ def create_test_routes(db, drivers, vehicles):
             departure_time="17:00",
             price_per_seat=1800.00,
             available_seats=4,
-            total_seats=4,
             status=RouteStatus.ACTIVE,
             bus_stops=["VI", "Obalende", "Oshodi", "Ikeja"]
         ),
         
         # Route 6: Festac to Island
-        Route(
+        dict(
             driver_id=drivers[2].id,
             vehicle_id=vehicles[2].id,
             start_location="Festac",
@@ -234,51 +238,58 @@ def create_test_routes(db, drivers, vehicles):
             departure_time="08:30",
             price_per_seat=1600.00,
             available_seats=3,
-            total_seats=4,
             status=RouteStatus.ACTIVE,
             bus_stops=["Festac", "Oshodi", "Obalende", "Ikoyi"]
         ),
     ]
     
-    db.add_all(routes)
-    db.commit()
+    db.execute(insert(Route), routes)
     
     print(f"✅ Created {len(routes)} active routes")
     print("\n   Available routes for testing:")
     for i, route in enumerate(routes, 1):
-        print(f"   {i}. {route.start_location} → {route.end_location} at {route.departure_time} (₦{route.price_per_seat})")
+        print(f"   {i}. {route['start_location']} → {route['end_location']} at {route['departure_time']} (₦{route['price_per_seat']})")
     
     return routes
 
 def main():
     """Main seeding function"""
+    # Block-buffer stdout instead of flushing every line; flushed once per phase
+    sys.stdout.reconfigure(line_buffering=False, write_through=False)
+    
     print("=" * 60)
     print("🌱 OPENRIDE DEMO DATA SEEDER")
     print("=" * 60)
     
     # Initialize database
     print("\n📦 Initializing database...")
+    sys.stdout.flush()
     init_db()
     
     # Create session
     db = SessionLocal()
     
     try:
-        # Clear existing data
-        clear_database(db)
-        
-        # Create users
-        users = create_test_users(db)
-        
-        # Separate riders and drivers
-        riders = [u for u in users if u.role == UserRole.RIDER]
-        drivers = [u for u in users if u.role == UserRole.DRIVER]
-        
-        # Create vehicles for drivers
-        vehicles = create_test_vehicles(db, drivers)
+        # Clear and re-seed in one transaction (single commit/fsync), no autoflush
+        with db.no_autoflush:
+            # Clear existing data
+            clear_database(db)
+            
+            # Create users
+            users = create_test_users(db)
+            
+            # Separate riders and drivers
+            riders = [u for u in users if u.role == UserRole.RIDER]
+            drivers = [u for u in users if u.role == UserRole.DRIVER]
+            
+            # Create vehicles for drivers
+            vehicles = create_test_vehicles(db, drivers)
+            
+            # Create routes
+            routes = create_test_routes(db, drivers, vehicles)
         
-        # Create routes
-        routes = create_test_routes(db, drivers, vehicles)
+        db.commit()
+        sys.stdout.flush()
         
         print("\n" + "=" * 60)
         print("✅ DEMO DATA SEEDED SUCCESSFULLY!")
@@ -320,6 +331,7 @@ def main():
         raise
     finally:
         db.close()
+        sys.stdout.flush()
 
 if __name__ == "__main__":
     main()
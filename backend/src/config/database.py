@@ -7,47 +7,190 @@ For demo purposes, we use SQLite which requires:
 - Database stored as a file (openride_demo.db)
 - Perfect for hackathon demos and testing
 """
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, event, inspect, select, update
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from sqlalchemy.orm import sessionmaker
+from uuid import uuid4
 from .settings import get_settings
 
 settings = get_settings()
 
+# Pool tuning for PostgreSQL: keep warm connections, recycle them before the
+# server drops idle ones, and fail fast instead of queueing forever
+POSTGRES_POOL_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+}
+
 # Create SQLAlchemy engine with SQLite-specific configuration
 if settings.DATABASE_URL.startswith("sqlite"):
     # SQLite configuration for demo - no threading checks needed for async FastAPI
     engine = create_engine(
         settings.DATABASE_URL,
         connect_args={"check_same_thread": False},  # Required for SQLite with FastAPI
+        insertmanyvalues_page_size=10000,  # Batch bulk INSERT ... RETURNING (seed script)
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
         echo=False  # Set to True for SQL debugging
     )
 else:
     # PostgreSQL configuration (for production)
     engine = create_engine(
         settings.DATABASE_URL,
-        pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20
+        connect_args={"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"},
+        insertmanyvalues_page_size=10000,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        **POSTGRES_POOL_OPTIONS
+    )
+
+
+def get_async_database_url(url: str) -> str:
+    """
+    Map the configured database URL onto its asyncio driver
+    (aiosqlite for the SQLite demo, asyncpg for PostgreSQL)
+    """
+    if url.startswith("sqlite:///"):
+        return url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
+# Async engine used by request handlers so DB I/O doesn't block the event loop.
+# aiosqlite runs each connection on its own dedicated thread and feeds it through
+# a queue, so SQLite calls are serialised off the loop without a separate executor
+if settings.DATABASE_URL.startswith("sqlite"):
+    # aiosqlite defaults to NullPool for file databases, which reopens the file and
+    # replays the PRAGMAs on every request; keep a small pool of open connections instead
+    async_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=5,
+        max_overflow=10,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        echo=False
     )
+elif settings.DB_BEHIND_PGBOUNCER:
+    # PgBouncer (transaction mode) already pools; it can't keep prepared statements
+    # across clients, so disable both caches and give every statement a unique name
+    async_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL),
+        poolclass=NullPool,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        connect_args={
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)},
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__"
+        }
+    )
+else:
+    # asyncpg keeps server-side prepared statements per connection, so the hot
+    # search/booking queries are parsed and planned once per pooled connection
+    async_engine = create_async_engine(
+        get_async_database_url(settings.DATABASE_URL),
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        connect_args={"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}},
+        **POSTGRES_POOL_OPTIONS
+    )
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """
+    Tune each new SQLite connection for concurrent reads and cheap commits:
+    - WAL journal so readers don't block the writer
+    - synchronous=NORMAL (safe with WAL, avoids an fsync per commit)
+    - in-memory temp tables, 256MB mmap and a 64MB page cache
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.close()
+
 
-# Create SessionLocal class
+if settings.DATABASE_URL.startswith("sqlite"):
+    # Pooled connections are reused, so the PRAGMAs run once per connection, not per request
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+# Sync sessions, kept for scripts such as seed_demo_data.py (handlers use AsyncSessionLocal)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create AsyncSessionLocal class (no expiry on commit so loaded objects stay usable).
+# Handlers open it with `async with` around the controller call, so the
+# connection goes back to the pool before the response is serialised
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class for models
 Base = declarative_base()
 
 
-def get_db() -> Generator[Session, None, None]:
+def _add_missing_columns() -> set:
+    """
+    Add model columns missing from existing tables (new columns must be nullable)
+    
+    Returns the (table, column) pairs that were added
+    """
+    added = set()
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_ddl = CreateColumn(column).compile(dialect=engine.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}")
+                added.add((table.name, column.name))
+    return added
+
+
+def _backfill_token_expiry():
     """
-    Dependency function to get database session
+    Give bookings created before token_expires_at existed their 24 hour expiry
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    from ..models.booking import TOKEN_VALIDITY  # models import Base from this module
+    
+    bookings = Base.metadata.tables["bookings"]
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(bookings.c.id, bookings.c.created_at).where(bookings.c.token_expires_at.is_(None))
+        ).all()
+        if rows:
+            conn.execute(
+                update(bookings)
+                .where(bookings.c.id == bindparam("booking_id"))
+                .values(token_expires_at=bindparam("expires_at")),
+                [{"booking_id": row.id, "expires_at": row.created_at + TOKEN_VALIDITY} for row in rows]
+            )
+
+
+def _backfill_departure_minutes():
+    """
+    Fill departure_minutes for routes created before the column existed
+    """
+    from ..models.route import departure_time_to_minutes  # models import Base from this module
+    
+    routes = Base.metadata.tables["routes"]
+    with engine.begin() as conn:
+        rows = conn.execute(
+            select(routes.c.id, routes.c.departure_time).where(routes.c.departure_minutes.is_(None))
+        ).all()
+        if rows:
+            conn.execute(
+                update(routes)
+                .where(routes.c.id == bindparam("route_id"))
+                .values(departure_minutes=bindparam("minutes")),
+                [{"route_id": row.id, "minutes": departure_time_to_minutes(row.departure_time)} for row in rows]
+            )
 
 
 def init_db():
@@ -58,8 +201,20 @@ def init_db():
     - Creates openride_demo.db file if it doesn't exist
     - Creates all tables automatically
     - No manual database setup required
+    
+    create_all skips tables that already exist, so columns and indexes added
+    to the models later are created separately for existing databases
     """
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=engine, checkfirst=True)
+    added_columns = _add_missing_columns()
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
+    if ("bookings", "token_expires_at") in added_columns:
+        _backfill_token_expiry()
+    if ("routes", "departure_minutes") in added_columns:
+        _backfill_departure_minutes()
     
     # Print database status for demo
     if settings.DATABASE_URL.startswith("sqlite"):
@@ -13,11 +13,27 @@ class Settings(BaseSettings):
     
     # Database - SQLite for demo (no setup required)
     DATABASE_URL: str = "sqlite:///./openride_demo.db"
+    AUTO_MIGRATE: bool = True  # Disable in production and run `python migrate.py` once instead
+    
+    # Connection pool (PostgreSQL only) - size per worker; raise towards 50 as load grows
+    DB_POOL_SIZE: int = 25
+    DB_MAX_OVERFLOW: int = 25
+    DB_POOL_RECYCLE: int = 1800  # seconds
+    DB_POOL_TIMEOUT: int = 30  # seconds
+    DB_STATEMENT_TIMEOUT_MS: int = 60000
+    DB_BEHIND_PGBOUNCER: bool = False  # Let PgBouncer pool connections instead of SQLAlchemy
+    DB_QUERY_CACHE_SIZE: int = 1200  # Compiled SQL statements cached per engine
     
     # Security
     JWT_SECRET_KEY: str = "demo-secret-key-change-in-production-openride-2024"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours for demo
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 19456  # KiB (~19 MiB per hash in flight)
+    ARGON2_PARALLELISM: int = 1
+    BCRYPT_ROUNDS: int = 12  # Only used to verify legacy bcrypt hashes
+    USER_CACHE_TTL_SECONDS: int = 30  # Authenticated user snapshots cached per worker
+    TOKEN_CACHE_TTL_SECONDS: int = 60  # Verified JWT subjects cached per worker (never past token expiry)
     
     # Interswitch Payment Gateway (QA/Test Environment)
     INTERSWITCH_MERCHANT_CODE: str = "MX007"
@@ -30,6 +46,8 @@ class Settings(BaseSettings):
     # Blockchain Configuration
     BLOCKCHAIN_NETWORK: str = "demo-blockchain"
     BLOCKCHAIN_ENABLED: bool = True
+    VERIFICATION_CACHE_TTL_SECONDS: int = 60  # Redeemed QR scan results cached per worker
+    VERIFICATION_BATCH_WINDOW_MS: float = 5  # Concurrent scans within this window share one query
     
     # CORS - Allow frontend access
     CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:3001", "http://localhost:5173"]
@@ -37,6 +55,7 @@ class Settings(BaseSettings):
     # AI Route Matching
     AI_MATCHING_THRESHOLD: float = 0.75
     MAX_ROUTE_DISTANCE_KM: int = 50
+    SEARCH_CACHE_TTL_SECONDS: int = 30  # Ranked search results cached per worker
     
     class Config:
         env_file = ".env"
@@ -1,48 +1,60 @@
 """
 Authentication controller for user registration and login
 """
-from sqlalchemy.orm import Session
-from datetime import timedelta
-from typing import Dict
+import anyio
+from uuid import UUID
+from sqlalchemy import insert, select, update, or_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.user import User
 from ..schemas.user_schema import UserCreate, UserLogin, TokenResponse, UserResponse
-from ..utils.auth import hash_password, verify_password, create_access_token
+from ..utils.auth import hash_password, verify_password, password_needs_rehash, create_access_token
 from ..middleware.error_handler import BadRequestException, UnauthorizedException
-from ..config.settings import get_settings
 
-settings = get_settings()
+# Columns needed to build a UserResponse without loading the full ORM object
+USER_RESPONSE_COLUMNS = (
+    User.id, User.name, User.email, User.phone, User.role,
+    User.profile_image, User.is_verified, User.created_at
+)
 
+# Verified against when the email is unknown so every failed login costs one hash check
+_DUMMY_HASH = hash_password("__absent__")
 
-def register_user(user_data: UserCreate, db: Session) -> TokenResponse:
+
+async def register_user(user_data: UserCreate, db: AsyncSession) -> TokenResponse:
     """
     Register a new user
     """
-    # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
-    if existing_user:
+    # Check email and phone number in a single round trip
+    conflicts = (
+        await db.execute(
+            select(User.email, User.phone).where(
+                or_(User.email == user_data.email, User.phone == user_data.phone)
+            )
+        )
+    ).all()
+    if any(row.email == user_data.email for row in conflicts):
         raise BadRequestException("Email already registered")
-    
-    # Check phone number
-    existing_phone = db.query(User).filter(User.phone == user_data.phone).first()
-    if existing_phone:
+    if conflicts:
         raise BadRequestException("Phone number already registered")
     
-    # Create new user
-    hashed_password = hash_password(user_data.password)
-    
-    new_user = User(
-        name=user_data.name,
-        email=user_data.email,
-        phone=user_data.phone,
-        password_hash=hashed_password,
-        role=user_data.role,
-        emergency_contact=user_data.emergency_contact
-    )
+    # Create new user (hashing is CPU-bound, so keep it off the event loop)
+    hashed_password = await anyio.to_thread.run_sync(hash_password, user_data.password)
     
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    # Insert and read back the generated fields in one round trip (no refresh SELECT)
+    new_user = (
+        await db.execute(
+            insert(User).values(
+                name=user_data.name,
+                email=user_data.email,
+                phone=user_data.phone,
+                password_hash=hashed_password,
+                role=user_data.role,
+                emergency_contact=user_data.emergency_contact
+            ).returning(*USER_RESPONSE_COLUMNS)
+        )
+    ).one()
+    await db.commit()
     
     # Generate token
     access_token = create_access_token(
@@ -52,24 +64,39 @@ def register_user(user_data: UserCreate, db: Session) -> TokenResponse:
     return TokenResponse(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse.from_orm(new_user)
+        user=UserResponse.model_validate(new_user)
     )
 
 
-def login_user(login_data: UserLogin, db: Session) -> TokenResponse:
+async def login_user(login_data: UserLogin, db: AsyncSession) -> TokenResponse:
     """
     Authenticate user and return token
     """
-    # Find user by email
-    user = db.query(User).filter(User.email == login_data.email).first()
+    # Find user by email (indexed lookup of only the columns we need)
+    user = (
+        await db.execute(
+            select(User.password_hash, *USER_RESPONSE_COLUMNS).where(User.email == login_data.email)
+        )
+    ).first()
     
     if not user:
+        await anyio.to_thread.run_sync(verify_password, login_data.password, _DUMMY_HASH)
         raise UnauthorizedException("Invalid email or password")
     
-    # Verify password
-    if not verify_password(login_data.password, user.password_hash):
+    # Verify password (in a worker thread so the event loop isn't stalled)
+    if not await anyio.to_thread.run_sync(verify_password, login_data.password, user.password_hash):
         raise UnauthorizedException("Invalid email or password")
     
+    # Upgrade bcrypt or outdated argon2 hashes while we have the plain password
+    if password_needs_rehash(user.password_hash):
+        new_hash = await anyio.to_thread.run_sync(hash_password, login_data.password)
+        await db.execute(
+            update(User)
+            .where(User.id == user.id, User.password_hash == user.password_hash)
+            .values(password_hash=new_hash)
+        )
+        await db.commit()
+    
     # Generate token
     access_token = create_access_token(
         data={"sub": str(user.id), "email": user.email}
@@ -78,19 +105,19 @@ def login_user(login_data: UserLogin, db: Session) -> TokenResponse:
     return TokenResponse(
         access_token=access_token,
         token_type="bearer",
-        user=UserResponse.from_orm(user)
+        user=UserResponse.model_validate(user)
     )
 
 
-def get_user_profile(user_id: str, db: Session) -> UserResponse:
+async def get_user_profile(user_id: UUID, db: AsyncSession) -> UserResponse:
     """
     Get user profile by ID
     """
-    from uuid import UUID
-    
-    user = db.query(User).filter(User.id == UUID(user_id)).first()
+    user = (
+        await db.execute(select(*USER_RESPONSE_COLUMNS).where(User.id == user_id))
+    ).first()
     
     if not user:
         raise BadRequestException("User not found")
     
-    return UserResponse.from_orm(user)
+    return UserResponse.model_validate(user)
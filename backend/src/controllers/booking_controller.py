@@ -1,16 +1,25 @@
 """
 Booking controller for managing ride bookings
+
+Relationship loading: joinedload for many-to-one hops (booking -> route ->
+driver/vehicle), selectinload for one-to-many collections so joined rows
+don't multiply. List endpoints skip relationship loading entirely and read a
+single projected JOIN (see BOOKING_DETAIL_COLUMNS).
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import and_, select, tuple_, update
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
 from uuid import UUID
 import json
 
 from ..models.booking import Booking, BookingStatus
 from ..models.route import Route, RouteStatus
 from ..models.user import User
+from ..schemas.user_schema import UserResponse
+from ..models.vehicle import Vehicle
 from ..schemas.booking_schema import (
     BookingCreate, 
     BookingUpdate, 
@@ -21,16 +30,199 @@ from ..schemas.booking_schema import (
     BookingVerificationResponse
 )
 from ..middleware.error_handler import NotFoundException, BadRequestException
+from ..config.database import AsyncSessionLocal
+from ..config.settings import get_settings
+from ..utils.batching import BatchLoader
+from ..utils.cache import TTLCache
+from .route_controller import search_cache
 from ..utils.blockchain import (
     generate_booking_token,
     verify_booking_token,
     validate_token_timestamp,
-    generate_qr_code_data,
-    simulate_blockchain_confirmation
+    generate_qr_code_data
+)
+
+
+settings = get_settings()
+
+# Drivers re-scan the same QR while riders board; only redeemed (terminal) results
+# are cached, since a boardable one can expire, be cancelled or be redeemed in
+# another worker without this worker's cache hearing about it
+verification_cache = TTLCache(ttl_seconds=settings.VERIFICATION_CACHE_TTL_SECONDS)
+
+async def _load_bookings_for_verification(booking_ids: List[UUID]) -> Dict[UUID, Booking]:
+    """
+    Fetch every booking scanned in the current batch window with one IN query
+    
+    Uses its own session (no expiry on commit), so the returned rows stay
+    readable after it closes
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Booking)
+            .options(joinedload(Booking.route), joinedload(Booking.rider))
+            .where(Booking.id.in_(booking_ids))
+        )
+        return {booking.id: booking for booking in result.scalars()}
+
+
+# Riders board together, so drivers' verification scans arrive in bursts
+verification_loader = BatchLoader(
+    _load_bookings_for_verification,
+    window_seconds=settings.VERIFICATION_BATCH_WINDOW_MS / 1000
 )
 
+# Flat projection for booking list endpoints: one joined SELECT, no ORM objects
+BOOKING_DETAIL_COLUMNS = (
+    Booking.id, Booking.route_id, Booking.rider_id, Booking.seats_booked,
+    Booking.total_amount, Booking.payment_status, Booking.blockchain_token,
+    Booking.pickup_stop, Booking.dropoff_stop, Booking.status, Booking.created_at,
+    User.name.label("driver_name"),
+    User.phone.label("driver_phone"),
+    (Vehicle.color + " " + Vehicle.make + " " + Vehicle.model).label("vehicle_info"),
+    Route.start_location.label("from_location"),
+    Route.end_location.label("to_location"),
+    Route.departure_time,
+    Route.departure_date
+)
+
+
+# Booking lists are returned newest first, one page at a time
+BOOKING_PAGE_SIZE = 50
+MAX_BOOKING_PAGE_SIZE = 200
+
+
+def _select_booking_details(*criteria):
+    """
+    Build the joined booking -> route -> driver/vehicle SELECT for list endpoints
+    """
+    return (
+        select(*BOOKING_DETAIL_COLUMNS)
+        .join(Route, Booking.route_id == Route.id)
+        .join(User, Route.driver_id == User.id)
+        .join(Vehicle, Route.vehicle_id == Vehicle.id)
+        .where(*criteria)
+    )
+
+
+def _parse_booking_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Split a "created_at,id" page cursor into its keyset values
+    """
+    try:
+        created_at, booking_id = cursor.split(",", 1)
+        return datetime.fromisoformat(created_at), UUID(booking_id)
+    except ValueError:
+        raise BadRequestException("Invalid page cursor")
+
+
+def _select_booking_page(criteria, limit: int, after: Optional[str]):
+    """
+    One keyset page of booking details, newest first
+    
+    Seeking past (created_at, id) of the previous page's last row walks the
+    (owner, created_at, id) index instead of counting through an OFFSET
+    """
+    query = _select_booking_details(criteria)
+    if after:
+        query = query.where(tuple_(Booking.created_at, Booking.id) < _parse_booking_cursor(after))
+    return query.order_by(Booking.created_at.desc(), Booking.id.desc()).limit(limit)
+
+
+def next_booking_cursor(bookings: List[BookingDetailResponse], limit: int) -> Optional[str]:
+    """
+    Cursor for the page after this one, or None if this was the last page
+    """
+    if len(bookings) < limit:
+        return None
+    last = bookings[-1]
+    return f"{last.created_at.isoformat()},{last.id}"
+
+
+def _booking_details_from_rows(rows) -> List[BookingDetailResponse]:
+    """
+    Turn projected rows into responses without re-validating database values
+    """
+    return [
+        BookingDetailResponse.model_construct(**{**row._mapping, "status": row.status.value})
+        for row in rows
+    ]
+
+
+async def reserve_route_seats(route_id: UUID, seats: int, db: AsyncSession) -> bool:
+    """
+    Atomically take seats from a route
+    
+    A single conditional UPDATE (row-locked by the database) replaces the
+    read-check-subtract sequence, so concurrent confirmations can't oversell.
+    Returns False if the route doesn't have enough seats left.
+    """
+    result = await db.execute(
+        update(Route)
+        .where(Route.id == route_id, Route.available_seats >= seats)
+        .values(available_seats=Route.available_seats - seats)
+    )
+    return result.rowcount > 0
+
+
+async def release_route_seats(route_id: UUID, seats: int, db: AsyncSession) -> None:
+    """
+    Atomically give seats back to a route
+    """
+    await db.execute(
+        update(Route)
+        .where(Route.id == route_id)
+        .values(available_seats=Route.available_seats + seats)
+    )
+
+
+@lru_cache(maxsize=1024)
+def _booking_token_data(booking_id: UUID, route_id: UUID, rider_id: UUID, amount: float, created_at: datetime) -> Dict:
+    """
+    Token data shown on verification, memoised per booking
+    
+    Every input is fixed once the booking exists, so repeat scans reuse the
+    same hashed token instead of regenerating it
+    """
+    return generate_booking_token(
+        booking_id=booking_id,
+        route_id=route_id,
+        rider_id=rider_id,
+        amount=amount,
+        timestamp=created_at
+    )
+
 
-def create_booking(booking_data: BookingCreate, rider: User, db: Session) -> BookingWithTokenResponse:
+def _build_booking_detail(booking: Booking, route: Route, driver: User, vehicle_info: str) -> BookingDetailResponse:
+    """
+    Assemble a booking detail response straight from loaded ORM rows
+    
+    The values come from the database, so model_construct skips a second
+    round of validation (and the intermediate dict of BookingResponse)
+    """
+    return BookingDetailResponse.model_construct(
+        id=booking.id,
+        route_id=booking.route_id,
+        rider_id=booking.rider_id,
+        seats_booked=booking.seats_booked,
+        total_amount=booking.total_amount,
+        payment_status=booking.payment_status,
+        blockchain_token=booking.blockchain_token,
+        pickup_stop=booking.pickup_stop,
+        dropoff_stop=booking.dropoff_stop,
+        status=booking.status.value,
+        created_at=booking.created_at,
+        driver_name=driver.name,
+        driver_phone=driver.phone,
+        vehicle_info=vehicle_info,
+        from_location=route.start_location,
+        to_location=route.end_location,
+        departure_time=route.departure_time,
+        departure_date=route.departure_date
+    )
+
+
+async def create_booking(booking_data: BookingCreate, rider: UserResponse, db: AsyncSession) -> BookingWithTokenResponse:
     """
     Create a new booking with blockchain token generation
     
@@ -38,13 +230,15 @@ def create_booking(booking_data: BookingCreate, rider: User, db: Session) -> Boo
     1. Validates route availability and seat capacity
     2. Creates pending booking in database
     3. Generates blockchain verification token
-    4. Simulates blockchain confirmation
-    5. Returns booking with full token data for QR code generation
+    4. Returns booking with full token data for QR code generation
     """
-    # Verify route exists and is active
-    route = db.query(Route).filter(
-        and_(Route.id == booking_data.route_id, Route.status == RouteStatus.ACTIVE)
-    ).first()
+    # Verify route exists and is active. Seats, price and status all change, so
+    # they are read fresh each time, but only those columns are fetched (the
+    # statement itself is compiled once by SQLAlchemy's statement cache)
+    route = (await db.execute(
+        select(Route.id, Route.driver_id, Route.available_seats, Route.price_per_seat)
+        .where(Route.id == booking_data.route_id, Route.status == RouteStatus.ACTIVE)
+    )).first()
     
     if not route:
         raise NotFoundException("Route not found or not available")
@@ -72,42 +266,44 @@ def create_booking(booking_data: BookingCreate, rider: User, db: Session) -> Boo
         payment_status="pending"
     )
     
+    # Flush to assign the booking id; everything below lands in a single commit
     db.add(new_booking)
-    db.commit()
-    db.refresh(new_booking)
+    await db.flush()
     
     # Generate blockchain token with full metadata
     token_data = generate_booking_token(
         booking_id=new_booking.id,
         route_id=route.id,
         rider_id=rider.id,
-        amount=total_amount
+        amount=total_amount,
+        timestamp=new_booking.created_at
     )
     
-    # Simulate blockchain confirmation (2 second delay)
-    # In production, this would be actual blockchain transaction
-    confirmation = simulate_blockchain_confirmation(delay_seconds=0.5)  # Reduced for demo
-    
     # Store token ID in database
     new_booking.blockchain_token = token_data["tokenId"]
-    db.commit()
-    db.refresh(new_booking)
+    await db.commit()
+    await db.refresh(new_booking)
     
     # Build response with token data
-    booking_response = BookingResponse.from_orm(new_booking)
+    booking_response = BookingResponse.model_validate(new_booking)
     token_response = BlockchainTokenData(**token_data)
     
     return BookingWithTokenResponse(
-        **booking_response.dict(),
+        **booking_response.model_dump(),
         token_data=token_response
     )
 
 
-def get_booking_by_id(booking_id: UUID, user: User, db: Session) -> BookingDetailResponse:
+async def get_booking_by_id(booking_id: UUID, user: UserResponse, db: AsyncSession) -> BookingDetailResponse:
     """
     Get detailed booking information
     """
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = (await db.execute(
+        select(Booking).options(
+            joinedload(Booking.route).joinedload(Route.driver),
+            joinedload(Booking.route).joinedload(Route.vehicle)
+        ).where(Booking.id == booking_id)
+    )).scalars().first()
     
     if not booking:
         raise NotFoundException("Booking not found")
@@ -122,91 +318,54 @@ def get_booking_by_id(booking_id: UUID, user: User, db: Session) -> BookingDetai
     vehicle = route.vehicle
     vehicle_info = f"{vehicle.color} {vehicle.make} {vehicle.model} ({vehicle.plate_number})"
     
-    booking_dict = {
-        **BookingResponse.from_orm(booking).dict(),
-        "driver_name": driver.name,
-        "driver_phone": driver.phone,
-        "vehicle_info": vehicle_info,
-        "from_location": route.start_location,
-        "to_location": route.end_location,
-        "departure_time": route.departure_time,
-        "departure_date": route.departure_date
-    }
-    
-    return BookingDetailResponse(**booking_dict)
+    return _build_booking_detail(booking, route, driver, vehicle_info)
 
 
-def get_user_bookings(user: User, db: Session) -> List[BookingDetailResponse]:
+async def get_user_bookings(
+    user: UserResponse,
+    db: AsyncSession,
+    limit: int = BOOKING_PAGE_SIZE,
+    after: Optional[str] = None
+) -> List[BookingDetailResponse]:
     """
-    Get all bookings for a user (as rider or driver)
+    Get a page of bookings for a user (as rider), newest first
     """
     # Get bookings as rider
-    rider_bookings = db.query(Booking).filter(Booking.rider_id == user.id).all()
-    
-    result = []
-    for booking in rider_bookings:
-        route = booking.route
-        driver = route.driver
-        vehicle = route.vehicle
-        vehicle_info = f"{vehicle.color} {vehicle.make} {vehicle.model}"
-        
-        booking_dict = {
-            **BookingResponse.from_orm(booking).dict(),
-            "driver_name": driver.name,
-            "driver_phone": driver.phone,
-            "vehicle_info": vehicle_info,
-            "from_location": route.start_location,
-            "to_location": route.end_location,
-            "departure_time": route.departure_time,
-            "departure_date": route.departure_date
-        }
-        
-        result.append(BookingDetailResponse(**booking_dict))
+    rows = (await db.execute(_select_booking_page(Booking.rider_id == user.id, limit, after))).all()
     
-    return result
+    return _booking_details_from_rows(rows)
 
 
-def get_route_bookings(route_id: UUID, driver: User, db: Session) -> List[BookingDetailResponse]:
+async def get_route_bookings(
+    route_id: UUID,
+    driver: UserResponse,
+    db: AsyncSession,
+    limit: int = BOOKING_PAGE_SIZE,
+    after: Optional[str] = None
+) -> List[BookingDetailResponse]:
     """
-    Get all bookings for a specific route (driver only)
+    Get a page of bookings for a specific route (driver only), newest first
     """
     # Verify route belongs to driver
-    route = db.query(Route).filter(
-        and_(Route.id == route_id, Route.driver_id == driver.id)
-    ).first()
+    route_exists = (await db.execute(
+        select(Route.id).where(and_(Route.id == route_id, Route.driver_id == driver.id))
+    )).first()
     
-    if not route:
+    if not route_exists:
         raise NotFoundException("Route not found or you don't have permission")
     
-    bookings = db.query(Booking).filter(Booking.route_id == route_id).all()
-    
-    result = []
-    for booking in bookings:
-        rider = booking.rider
-        vehicle = route.vehicle
-        vehicle_info = f"{vehicle.color} {vehicle.make} {vehicle.model}"
-        
-        booking_dict = {
-            **BookingResponse.from_orm(booking).dict(),
-            "driver_name": driver.name,
-            "driver_phone": driver.phone,
-            "vehicle_info": vehicle_info,
-            "from_location": route.start_location,
-            "to_location": route.end_location,
-            "departure_time": route.departure_time,
-            "departure_date": route.departure_date
-        }
-        
-        result.append(BookingDetailResponse(**booking_dict))
+    rows = (await db.execute(_select_booking_page(Booking.route_id == route_id, limit, after))).all()
     
-    return result
+    return _booking_details_from_rows(rows)
 
 
-def update_booking(booking_id: UUID, booking_data: BookingUpdate, user: User, db: Session) -> BookingResponse:
+async def update_booking(booking_id: UUID, booking_data: BookingUpdate, user: UserResponse, db: AsyncSession) -> BookingResponse:
     """
     Update booking status
     """
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    booking = (await db.execute(
+        select(Booking).options(joinedload(Booking.route)).where(Booking.id == booking_id)
+    )).scalars().first()
     
     if not booking:
         raise NotFoundException("Booking not found")
@@ -220,27 +379,47 @@ def update_booking(booking_id: UUID, booking_data: BookingUpdate, user: User, db
     if booking_data.status:
         old_status = booking.status
         new_status = BookingStatus(booking_data.status)
-        booking.status = new_status
+        
+        # Only apply the change if nobody else moved the booking since we read
+        # it, so concurrent confirms can't take the route's seats twice
+        changed = await db.execute(
+            update(Booking)
+            .where(Booking.id == booking_id, Booking.status == old_status)
+            .values(status=new_status)
+        )
+        if changed.rowcount != 1:
+            await db.rollback()
+            raise BadRequestException("Booking was updated by another request - please retry")
         
         # If booking is confirmed, reduce available seats
         if new_status == BookingStatus.CONFIRMED and old_status != BookingStatus.CONFIRMED:
-            route.available_seats -= booking.seats_booked
+            if not await reserve_route_seats(route.id, booking.seats_booked, db):
+                await db.rollback()
+                raise BadRequestException("Not enough seats available on this route")
         
         # If booking is cancelled, restore available seats
         elif new_status == BookingStatus.CANCELLED and old_status == BookingStatus.CONFIRMED:
-            route.available_seats += booking.seats_booked
+            await release_route_seats(route.id, booking.seats_booked, db)
     
-    db.commit()
-    db.refresh(booking)
+    await db.commit()
+    verification_cache.delete(booking_id)
+    search_cache.clear()
+    await db.refresh(booking)
     
-    return BookingResponse.from_orm(booking)
+    return BookingResponse.model_validate(booking)
 
 
-def cancel_booking(booking_id: UUID, user: User, db: Session) -> dict:
+async def cancel_booking(booking_id: UUID, user: UserResponse, db: AsyncSession) -> dict:
     """
     Cancel a booking
     """
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    # Only the columns the checks need; the row lock keeps the seat release
+    # below from racing a concurrent confirm/cancel
+    booking = (await db.execute(
+        select(Booking.rider_id, Booking.route_id, Booking.seats_booked, Booking.status)
+        .where(Booking.id == booking_id)
+        .with_for_update()
+    )).first()
     
     if not booking:
         raise NotFoundException("Booking not found")
@@ -253,21 +432,28 @@ def cancel_booking(booking_id: UUID, user: User, db: Session) -> dict:
     if booking.status == BookingStatus.CANCELLED:
         raise BadRequestException("Booking is already cancelled")
     
-    # Update status
-    old_status = booking.status
-    booking.status = BookingStatus.CANCELLED
+    # Update status without loading or flushing the whole booking
+    cancelled = await db.execute(
+        update(Booking)
+        .where(Booking.id == booking_id, Booking.status == booking.status)
+        .values(status=BookingStatus.CANCELLED)
+    )
+    if cancelled.rowcount != 1:
+        await db.rollback()
+        raise BadRequestException("Booking is already cancelled")
     
     # Restore seats if booking was confirmed
-    if old_status == BookingStatus.CONFIRMED:
-        route = booking.route
-        route.available_seats += booking.seats_booked
+    if booking.status == BookingStatus.CONFIRMED:
+        await release_route_seats(booking.route_id, booking.seats_booked, db)
     
-    db.commit()
+    await db.commit()
+    verification_cache.delete(booking_id)
+    search_cache.clear()
     
     return {"message": "Booking cancelled successfully", "booking_id": str(booking_id)}
 
 
-def verify_booking_by_token(booking_id: UUID, db: Session) -> BookingVerificationResponse:
+async def verify_booking_by_token(booking_id: UUID) -> BookingVerificationResponse:
     """
     Verify booking using blockchain token for driver QR scanning
     
@@ -287,8 +473,12 @@ def verify_booking_by_token(booking_id: UUID, db: Session) -> BookingVerificatio
     Returns:
         BookingVerificationResponse with rider details and verification status
     """
-    # Get booking
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    cached = verification_cache.get(booking_id)
+    if cached is not None:
+        return cached
+    
+    # Get booking with its route and rider (batched with concurrent scans)
+    booking = await verification_loader.load(booking_id)
     
     if not booking:
         raise NotFoundException("Booking not found")
@@ -296,7 +486,6 @@ def verify_booking_by_token(booking_id: UUID, db: Session) -> BookingVerificatio
     # Get related data
     route = booking.route
     rider = booking.rider
-    vehicle = route.vehicle
     
     # Check if booking has blockchain token
     if not booking.blockchain_token:
@@ -311,8 +500,7 @@ def verify_booking_by_token(booking_id: UUID, db: Session) -> BookingVerificatio
     is_redeemed = booking.status == BookingStatus.COMPLETED
     
     # Check token expiration (24 hours from creation)
-    token_age = datetime.utcnow() - booking.created_at
-    is_expired = token_age.total_seconds() > 86400  # 24 hours
+    is_expired = booking.token_expires_at < datetime.utcnow()
     
     # Determine verification status
     verified = not is_redeemed and not is_expired and booking.payment_status == "successful"
@@ -327,26 +515,23 @@ def verify_booking_by_token(booking_id: UUID, db: Session) -> BookingVerificatio
     else:
         message = "Token valid - rider can board"
     
-    # Regenerate token data for QR display
-    token_data_dict = generate_booking_token(
-        booking_id=booking.id,
-        route_id=route.id,
-        rider_id=rider.id,
-        amount=booking.total_amount,
-        timestamp=booking.created_at
-    )
-    
-    # Build QR data
-    qr_data = generate_qr_code_data(
-        token_id=booking.blockchain_token,
-        booking_id=booking.id,
-        timestamp=int(booking.created_at.timestamp())
-    )
+    # Token and QR data are only useful while the rider can still board
+    token_data = None
+    qr_data = None
+    if verified:
+        token_data = BlockchainTokenData(**_booking_token_data(
+            booking.id, route.id, rider.id, booking.total_amount, booking.created_at
+        ))
+        qr_data = generate_qr_code_data(
+            token_id=booking.blockchain_token,
+            booking_id=booking.id,
+            timestamp=int(booking.created_at.timestamp())
+        )
     
     # Build route info string
     route_info = f"{route.start_location} to {route.end_location} - {route.departure_time}"
     
-    return BookingVerificationResponse(
+    response = BookingVerificationResponse(
         booking_id=booking.id,
         token_id=booking.blockchain_token,
         rider_name=rider.name,
@@ -358,13 +543,19 @@ def verify_booking_by_token(booking_id: UUID, db: Session) -> BookingVerificatio
         is_redeemed=is_redeemed,
         is_expired=is_expired,
         qr_data=qr_data,
-        blockchain_token=BlockchainTokenData(**token_data_dict),
+        blockchain_token=token_data,
         verified=verified,
         message=message
     )
+    
+    # Boardable and unpaid results are re-read on every scan
+    if is_redeemed:
+        verification_cache.set(booking_id, response)
+    
+    return response
 
 
-def redeem_booking_token(booking_id: UUID, driver: User, db: Session) -> dict:
+async def redeem_booking_token(booking_id: UUID, driver: UserResponse, db: AsyncSession) -> dict:
     """
     Redeem a booking token after scanning QR code (driver action)
     
@@ -380,15 +571,52 @@ def redeem_booking_token(booking_id: UUID, driver: User, db: Session) -> dict:
     Returns:
         Success message with booking details
     """
-    # Get booking
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    # Mark as completed (redeemed) only if every boarding condition holds; a single
+    # conditional UPDATE makes double redemption by concurrent scans impossible
+    redeemed = (await db.execute(
+        update(Booking)
+        .where(
+            Booking.id == booking_id,
+            Booking.route_id.in_(select(Route.id).where(Route.driver_id == driver.id)),
+            Booking.status == BookingStatus.CONFIRMED,
+            Booking.payment_status == "successful",
+            Booking.token_expires_at > datetime.utcnow()
+        )
+        .values(status=BookingStatus.COMPLETED)
+        .returning(Booking.rider_id, Booking.seats_booked)
+    )).first()
+    
+    if not redeemed:
+        await db.rollback()
+        await _raise_redeem_error(booking_id, driver, db)
+    
+    rider_name = (await db.execute(select(User.name).where(User.id == redeemed.rider_id))).scalar_one()
+    await db.commit()
+    verification_cache.delete(booking_id)
+    search_cache.clear()
+    
+    return {
+        "message": "Booking token redeemed successfully",
+        "booking_id": str(booking_id),
+        "rider_name": rider_name,
+        "seats_booked": redeemed.seats_booked,
+        "redeemed_at": datetime.utcnow().isoformat()
+    }
+
+
+async def _raise_redeem_error(booking_id: UUID, driver: UserResponse, db: AsyncSession) -> None:
+    """
+    Explain why a redemption was rejected (only runs on the failure path)
+    """
+    booking = (await db.execute(
+        select(Booking).options(joinedload(Booking.route)).where(Booking.id == booking_id)
+    )).scalars().first()
     
     if not booking:
         raise NotFoundException("Booking not found")
     
     # Verify driver owns this route
-    route = booking.route
-    if route.driver_id != driver.id:
+    if booking.route.driver_id != driver.id:
         raise BadRequestException("You don't have permission to redeem this booking")
     
     # Check booking status
@@ -401,19 +629,4 @@ def redeem_booking_token(booking_id: UUID, driver: User, db: Session) -> dict:
     if booking.payment_status != "successful":
         raise BadRequestException("Payment not confirmed")
     
-    # Check token expiration
-    token_age = datetime.utcnow() - booking.created_at
-    if token_age.total_seconds() > 86400:  # 24 hours
-        raise BadRequestException("Token has expired")
-    
-    # Mark as completed (redeemed)
-    booking.status = BookingStatus.COMPLETED
-    db.commit()
-    
-    return {
-        "message": "Booking token redeemed successfully",
-        "booking_id": str(booking_id),
-        "rider_name": booking.rider.name,
-        "seats_booked": booking.seats_booked,
-        "redeemed_at": datetime.utcnow().isoformat()
-    }
+    raise BadRequestException("Token has expired")
@@ -1,14 +1,15 @@
 """
 Payment controller for handling payment operations
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import Dict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import and_, select, update
+from typing import Dict, Optional
 from uuid import UUID
 
 from ..models.payment import Payment, PaymentStatus
 from ..models.booking import Booking, BookingStatus
-from ..models.user import User
+from ..schemas.user_schema import UserResponse
 from ..schemas.payment_schema import (
     PaymentInitiate, 
     PaymentInitializeResponse,
@@ -26,10 +27,136 @@ from ..utils.interswitch import (
     convert_to_kobo,
     verify_webhook_signature
 )
+from ..config.database import AsyncSessionLocal
+from ..utils.batching import SingleFlight
 from ..utils.blockchain import generate_booking_token
+from .booking_controller import reserve_route_seats, verification_cache
+from .route_controller import search_cache
 
+# Concurrent verifications of the same transaction reference
+verification_flights = SingleFlight()
 
-async def create_payment(payment_data: PaymentInitiate, user: User, db: Session) -> Dict:
+# Test card details are static - build them once
+TEST_CARD_INFO = TestCardInfo()
+TEST_CARD_INFO_DICT = TEST_CARD_INFO.model_dump()
+
+
+# Outcomes of _confirm_payment
+PAYMENT_CONFIRMED = "confirmed"
+PAYMENT_ALREADY_CONFIRMED = "already_confirmed"
+PAYMENT_REFUND_REQUIRED = "refund_required"
+
+# Booking states that already hold their seats on the route
+SEAT_HOLDING_STATUSES = (BookingStatus.CONFIRMED, BookingStatus.COMPLETED)
+
+REFUND_REQUIRED_MESSAGE = "Route is fully booked - payment has been flagged for refund"
+
+
+async def _claim_payment(payment_id: UUID, interswitch_ref: Optional[str], db: AsyncSession) -> bool:
+    """
+    Mark a payment successful unless another request already did
+    """
+    return (await db.execute(
+        update(Payment)
+        .where(Payment.id == payment_id, Payment.status != PaymentStatus.SUCCESSFUL)
+        .values(status=PaymentStatus.SUCCESSFUL, interswitch_ref=interswitch_ref)
+    )).rowcount > 0
+
+
+async def _fail_payment(payment: Payment, db: AsyncSession) -> bool:
+    """
+    Mark a payment and its booking failed unless the payment already succeeded
+    
+    Guarded like _confirm_payment, so a late failure callback can't overwrite
+    a payment that a concurrent webhook or verify call already confirmed.
+    """
+    booking_id = payment.booking_id
+    failed = (await db.execute(
+        update(Payment)
+        .where(Payment.id == payment.id, Payment.status != PaymentStatus.SUCCESSFUL)
+        .values(status=PaymentStatus.FAILED)
+    )).rowcount > 0
+    
+    if not failed:
+        await db.rollback()
+        return False
+    
+    await db.execute(
+        update(Booking).where(Booking.id == booking_id).values(payment_status="failed")
+    )
+    await db.commit()
+    return True
+
+
+async def _confirm_payment(payment: Payment, interswitch_ref: Optional[str], db: AsyncSession) -> str:
+    """
+    Mark a payment successful and confirm its booking exactly once
+    
+    The conditional UPDATEs only match while the payment is not yet SUCCESSFUL
+    and the booking doesn't hold seats yet, so a webhook retry racing a verify
+    call (or a driver confirming the booking) can't take its seats twice.
+    
+    Returns PAYMENT_CONFIRMED, PAYMENT_ALREADY_CONFIRMED when another request
+    got there first, or PAYMENT_REFUND_REQUIRED when the route sold out before
+    the payment landed: the payment stays on record as successful, but the
+    booking is cancelled and flagged for refund instead of confirming a seat
+    that doesn't exist.
+    """
+    booking = payment.booking
+    # Read up front - a rollback below expires the loaded objects
+    payment_id, booking_id = payment.id, booking.id
+    route_id, seats_booked = booking.route_id, booking.seats_booked
+    
+    if not await _claim_payment(payment_id, interswitch_ref, db):
+        # Rollback expires the booking; reload it so callers can still read it
+        await db.rollback()
+        await db.refresh(booking)
+        return PAYMENT_ALREADY_CONFIRMED
+    
+    # Take the seats only if this request moves the booking into CONFIRMED
+    # (skipped if the driver already confirmed it)
+    newly_confirmed = (await db.execute(
+        update(Booking)
+        .where(Booking.id == booking_id, Booking.status.notin_(SEAT_HOLDING_STATUSES))
+        .values(status=BookingStatus.CONFIRMED)
+    )).rowcount > 0
+    
+    if newly_confirmed and not await reserve_route_seats(route_id, seats_booked, db):
+        await db.rollback()
+        await _claim_payment(payment_id, interswitch_ref, db)
+        flagged = (await db.execute(
+            update(Booking)
+            .where(Booking.id == booking_id, Booking.status.notin_(SEAT_HOLDING_STATUSES))
+            .values(status=BookingStatus.CANCELLED, payment_status=PAYMENT_REFUND_REQUIRED)
+        )).rowcount > 0
+        if flagged:
+            await db.commit()
+            await db.refresh(booking)
+            verification_cache.delete(booking_id)
+            return PAYMENT_REFUND_REQUIRED
+        # A driver confirmation took the seats in the meantime - confirm as usual
+    
+    await db.refresh(booking)
+    booking.payment_status = "successful"
+    
+    # Generate blockchain token for booking verification
+    if not booking.blockchain_token:
+        token_data = generate_booking_token(
+            booking_id=booking.id,
+            route_id=booking.route_id,
+            rider_id=booking.rider_id,
+            amount=booking.total_amount,
+            timestamp=booking.created_at
+        )
+        booking.blockchain_token = token_data["tokenId"]
+    
+    await db.commit()
+    verification_cache.delete(booking_id)
+    search_cache.clear()
+    return PAYMENT_CONFIRMED
+
+
+async def create_payment(payment_data: PaymentInitiate, user: UserResponse, db: AsyncSession) -> Dict:
     """
     Initialize payment for a booking
     
@@ -45,15 +172,17 @@ async def create_payment(payment_data: PaymentInitiate, user: User, db: Session)
         pay_item_id, txn_ref, amount (in kobo), currency, mode
     """
     # Verify booking exists and belongs to user
-    booking = db.query(Booking).filter(
-        and_(Booking.id == payment_data.booking_id, Booking.rider_id == user.id)
-    ).first()
+    booking = (await db.execute(
+        select(Booking).options(joinedload(Booking.payment)).where(
+            and_(Booking.id == payment_data.booking_id, Booking.rider_id == user.id)
+        )
+    )).scalars().first()
     
     if not booking:
         raise NotFoundException("Booking not found")
     
     # Check if payment already exists and is successful
-    existing_payment = db.query(Payment).filter(Payment.booking_id == booking.id).first()
+    existing_payment = booking.payment
     if existing_payment and existing_payment.status == PaymentStatus.SUCCESSFUL:
         raise BadRequestException("Payment already completed for this booking")
     
@@ -92,22 +221,25 @@ async def create_payment(payment_data: PaymentInitiate, user: User, db: Session)
     # Update booking payment status
     booking.payment_status = "pending"
     
-    db.commit()
-    db.refresh(payment)
+    await db.commit()
+    await db.refresh(payment)
     
     # Return payment parameters for frontend
     return {
         "payment_id": str(payment.id),
         "payment_params": payment_response["data"],
         "booking_id": str(booking.id),
-        "test_card": TestCardInfo().dict()
+        "test_card": TEST_CARD_INFO_DICT
     }
 
 
-async def verify_payment_transaction(transaction_ref: str, db: Session) -> PaymentVerifyResponse:
+async def verify_payment_transaction(transaction_ref: str) -> PaymentVerifyResponse:
     """
     Verify payment with Interswitch
     
+    Concurrent calls for the same transaction reference (client callback
+    retries racing each other or the webhook) share one verification
+    
     Steps:
     1. Find payment by transaction reference
     2. Make GET request to Interswitch API to confirm transaction
@@ -122,60 +254,82 @@ async def verify_payment_transaction(transaction_ref: str, db: Session) -> Payme
     Returns:
         PaymentVerifyResponse with status, amounts, references, and verification details
     """
-    # Find payment by transaction reference
-    payment = db.query(Payment).filter(Payment.transaction_ref == transaction_ref).first()
-    
-    if not payment:
-        raise NotFoundException("Payment not found")
-    
-    # Get booking
-    booking = payment.booking
-    
-    # Verify with Interswitch API
-    verification_response = await verify_payment(
-        transaction_ref=transaction_ref,
-        amount=payment.amount
+    return await verification_flights.run(
+        transaction_ref, lambda: _verify_payment_transaction(transaction_ref)
     )
+
+
+def _already_confirmed_response(payment: Payment, booking: Booking) -> PaymentVerifyResponse:
+    """
+    Verification result for a payment that an earlier callback already settled
+    """
+    if booking.payment_status == PAYMENT_REFUND_REQUIRED:
+        raise BadRequestException(REFUND_REQUIRED_MESSAGE)
+    
+    return PaymentVerifyResponse(
+        status="successful",
+        transaction_ref=payment.transaction_ref,
+        interswitch_ref=payment.interswitch_ref,
+        amount=payment.amount,
+        amount_kobo=convert_to_kobo(payment.amount),
+        payment_method=payment.payment_method or "card",
+        verified=True,
+        response_code="00",
+        response_description="Payment already confirmed",
+        card_number=None,
+        timestamp=payment.updated_at.isoformat()
+    )
+
+
+async def _verify_payment_transaction(transaction_ref: str) -> PaymentVerifyResponse:
+    """
+    Look up, verify and settle one payment
     
-    # Update payment status based on verification
-    if verification_response.get("status") == "successful":
-        # Update payment to SUCCESSFUL
-        payment.status = PaymentStatus.SUCCESSFUL
-        payment.interswitch_ref = verification_response.get("interswitch_ref", payment.interswitch_ref)
+    Runs as a task shared by every waiting caller, so it uses its own session
+    rather than borrowing one that a caller may close first
+    """
+    async with AsyncSessionLocal() as db:
+        # Find payment by transaction reference
+        payment = (await db.execute(
+            select(Payment).options(
+                joinedload(Payment.booking)
+            ).where(Payment.transaction_ref == transaction_ref)
+        )).scalars().first()
         
-        # Update booking status to CONFIRMED
-        booking.payment_status = "successful"
-        booking.status = BookingStatus.CONFIRMED
+        if not payment:
+            raise NotFoundException("Payment not found")
         
-        # Generate blockchain token for booking verification
-        if not booking.blockchain_token:
-            blockchain_token = generate_booking_token(
-                booking.id,
-                booking.route_id,
-                booking.rider_id,
-                booking.seats_booked,
-                booking.total_amount
-            )
-            booking.blockchain_token = blockchain_token
+        # Already confirmed (callback retry or earlier webhook) - nothing to re-verify
+        booking = payment.booking
+        if payment.status == PaymentStatus.SUCCESSFUL:
+            return _already_confirmed_response(payment, booking)
         
-        # Reduce available seats on route (if not already done)
-        route = booking.route
-        if booking.seats_booked <= route.available_seats:
-            route.available_seats -= booking.seats_booked
+        # Verify with Interswitch API
+        verification_response = await verify_payment(
+            transaction_ref=transaction_ref,
+            amount=payment.amount
+        )
         
-    else:
-        # Update payment to FAILED
-        payment.status = PaymentStatus.FAILED
-        booking.payment_status = "failed"
-    
-    db.commit()
-    db.refresh(payment)
-    
-    # Return verification response
-    return PaymentVerifyResponse(**verification_response)
+        # Update payment status based on verification
+        if verification_response.get("status") == "successful":
+            await _confirm_payment(
+                payment,
+                verification_response.get("interswitch_ref", payment.interswitch_ref),
+                db
+            )
+            if booking.payment_status == PAYMENT_REFUND_REQUIRED:
+                raise BadRequestException(REFUND_REQUIRED_MESSAGE)
+        elif not await _fail_payment(payment, db):
+            # Confirmed by a concurrent webhook while we were verifying
+            await db.refresh(payment)
+            await db.refresh(booking)
+            return _already_confirmed_response(payment, booking)
+        
+        # Return verification response
+        return PaymentVerifyResponse(**verification_response)
 
 
-async def handle_payment_webhook(webhook_data: PaymentWebhook, signature: str = None, db: Session = None) -> Dict:
+async def handle_payment_webhook(webhook_data: PaymentWebhook, signature: str = None, db: AsyncSession = None) -> Dict:
     """
     Handle Interswitch payment webhook callback
     
@@ -190,6 +344,10 @@ async def handle_payment_webhook(webhook_data: PaymentWebhook, signature: str =
     Returns:
         Dict with processing result
     """
+    # Reject forged callbacks before touching the database
+    if not verify_webhook_signature(webhook_data.model_dump(), signature):
+        raise BadRequestException("Invalid webhook signature")
+    
     # Extract transaction reference (support multiple field names)
     transaction_ref = webhook_data.transaction_ref or webhook_data.MerchantReference
     
@@ -197,11 +355,32 @@ async def handle_payment_webhook(webhook_data: PaymentWebhook, signature: str =
         raise BadRequestException("Missing transaction reference in webhook data")
     
     # Find payment by transaction reference
-    payment = db.query(Payment).filter(Payment.transaction_ref == transaction_ref).first()
+    payment = (await db.execute(
+        select(Payment).options(
+            joinedload(Payment.booking)
+        ).where(Payment.transaction_ref == transaction_ref)
+    )).scalars().first()
     
     if not payment:
         raise NotFoundException(f"Payment not found for transaction: {transaction_ref}")
     
+    # Interswitch retries webhooks - acknowledge repeats without touching the booking again
+    if payment.status == PaymentStatus.SUCCESSFUL:
+        if payment.booking.payment_status == PAYMENT_REFUND_REQUIRED:
+            return {
+                "message": f"Webhook already processed - {REFUND_REQUIRED_MESSAGE}",
+                "transaction_ref": transaction_ref,
+                "status": PAYMENT_REFUND_REQUIRED,
+                "booking_id": str(payment.booking_id)
+            }
+        return {
+            "message": "Webhook already processed - Payment confirmed",
+            "transaction_ref": transaction_ref,
+            "status": "successful",
+            "booking_id": str(payment.booking_id),
+            "blockchain_token": payment.booking.blockchain_token
+        }
+    
     # Get response code (support multiple field names)
     response_code = webhook_data.ResponseCode or webhook_data.response_code or ""
     
@@ -211,34 +390,27 @@ async def handle_payment_webhook(webhook_data: PaymentWebhook, signature: str =
     
     # Update payment status based on webhook data
     if is_successful:
-        payment.status = PaymentStatus.SUCCESSFUL
-        payment.interswitch_ref = webhook_data.interswitch_ref or webhook_data.PaymentReference
-        
-        # Update booking
         booking = payment.booking
-        booking.payment_status = "successful"
-        booking.status = BookingStatus.CONFIRMED
-        
-        # Generate blockchain token if not exists
-        if not booking.blockchain_token:
-            blockchain_token = generate_booking_token(
-                booking.id,
-                booking.route_id,
-                booking.rider_id,
-                booking.seats_booked,
-                booking.total_amount
-            )
-            booking.blockchain_token = blockchain_token
-        
-        # Reduce available seats
-        route = booking.route
-        if booking.seats_booked <= route.available_seats:
-            route.available_seats -= booking.seats_booked
+        outcome = await _confirm_payment(
+            payment,
+            webhook_data.interswitch_ref or webhook_data.PaymentReference,
+            db
+        )
         
-        db.commit()
+        # Acknowledge the callback either way - the refund is handled out of band
+        if booking.payment_status == PAYMENT_REFUND_REQUIRED:
+            return {
+                "message": f"Webhook processed - {REFUND_REQUIRED_MESSAGE}",
+                "transaction_ref": transaction_ref,
+                "status": PAYMENT_REFUND_REQUIRED,
+                "booking_id": str(booking.id)
+            }
         
         return {
-            "message": "Webhook processed successfully - Payment confirmed",
+            "message": (
+                "Webhook processed successfully - Payment confirmed" if outcome == PAYMENT_CONFIRMED
+                else "Webhook already processed - Payment confirmed"
+            ),
             "transaction_ref": transaction_ref,
             "status": "successful",
             "booking_id": str(booking.id),
@@ -246,11 +418,15 @@ async def handle_payment_webhook(webhook_data: PaymentWebhook, signature: str =
         }
         
     else:
-        payment.status = PaymentStatus.FAILED
-        booking = payment.booking
-        booking.payment_status = "failed"
-        
-        db.commit()
+        booking_id = payment.booking_id
+        if not await _fail_payment(payment, db):
+            # A concurrent callback confirmed the payment first - keep it
+            return {
+                "message": "Webhook already processed - Payment confirmed",
+                "transaction_ref": transaction_ref,
+                "status": "successful",
+                "booking_id": str(booking_id)
+            }
         
         return {
             "message": "Webhook processed - Payment failed",
@@ -260,12 +436,17 @@ async def handle_payment_webhook(webhook_data: PaymentWebhook, signature: str =
         }
 
 
-def get_payment_by_booking(booking_id: UUID, user: User, db: Session) -> PaymentResponse:
+async def get_payment_by_booking(booking_id: UUID, user: UserResponse, db: AsyncSession) -> PaymentResponse:
     """
     Get payment information for a booking
     """
-    # Verify booking exists and user has access
-    booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    # Verify booking exists and user has access (route and payment loaded in the same query)
+    booking = (await db.execute(
+        select(Booking).options(
+            joinedload(Booking.route),
+            joinedload(Booking.payment)
+        ).where(Booking.id == booking_id)
+    )).scalars().first()
     
     if not booking:
         raise NotFoundException("Booking not found")
@@ -276,16 +457,16 @@ def get_payment_by_booking(booking_id: UUID, user: User, db: Session) -> Payment
         raise BadRequestException("You don't have permission to view this payment")
     
     # Get payment
-    payment = db.query(Payment).filter(Payment.booking_id == booking_id).first()
+    payment = booking.payment
     
     if not payment:
         raise NotFoundException("Payment not found for this booking")
     
-    return PaymentResponse.from_orm(payment)
+    return PaymentResponse.model_validate(payment)
 
 
 def get_test_card_info() -> TestCardInfo:
     """
     Get test card information for development/demo
     """
-    return TestCardInfo()
+    return TEST_CARD_INFO
@@ -1,29 +1,139 @@
 """
 Route controller for managing driver routes
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, or_, exists, func, select, update
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 from uuid import UUID
 
 from ..models.route import Route, RouteStatus
 from ..models.user import User
+from ..schemas.user_schema import UserResponse
 from ..models.vehicle import Vehicle
-from ..models.booking import Booking
-from ..schemas.route_schema import RouteCreate, RouteUpdate, RouteSearch, RouteResponse, RouteDetailResponse
+from ..models.booking import Booking, BookingStatus
+from ..models.rating import Rating
+from ..schemas.route_schema import (
+    RouteCreate,
+    RouteUpdate,
+    RouteSearch,
+    RouteResponse,
+    RouteDetailResponse,
+    RouteDetailListAdapter
+)
 from ..middleware.error_handler import NotFoundException, BadRequestException, ForbiddenException
-from ..utils.route_matching import rank_routes, is_time_in_range, calculate_route_match
+from ..config.settings import get_settings
+from ..utils.cache import TTLCache
+from ..utils.route_matching import rank_routes, calculate_route_match
 
 
-def create_route(route_data: RouteCreate, driver: User, db: Session) -> RouteResponse:
+settings = get_settings()
+
+# Route search returns at most this many ranked matches
+SEARCH_RESULT_LIMIT = 20
+
+# Ranked search results, stored as serialized JSON and keyed by the search
+# parameters, so a hit skips both the query and serialization. Anything that
+# changes a route's seats, status or confirmed bookings clears it (this worker
+# only; the TTL bounds staleness elsewhere)
+search_cache = TTLCache(ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS)
+
+# "Color Make Model", built in SQL so list queries need no Vehicle objects
+VEHICLE_INFO = (Vehicle.color + " " + Vehicle.make + " " + Vehicle.model).label("vehicle_info")
+
+# Per-route aggregates as correlated subqueries, so each route row comes back
+# with its counts in the same query (index lookups on bookings/ratings per row)
+CONFIRMED_BOOKINGS_COUNT = (
+    select(func.count(Booking.id))
+    .where(Booking.route_id == Route.id, Booking.status == BookingStatus.CONFIRMED)
+    .correlate(Route)
+    .scalar_subquery()
+    .label("bookings_count")
+)
+DRIVER_RATING = (
+    select(func.avg(Rating.rating))
+    .where(Rating.rated_user_id == Route.driver_id)
+    .correlate(Route)
+    .scalar_subquery()
+    .label("driver_rating")
+)
+
+# Shown for drivers who haven't been rated yet
+DEFAULT_DRIVER_RATING = 4.5
+
+
+def _rating_or_default(average: Optional[float]) -> float:
+    """
+    Round an average driver rating, falling back for unrated drivers
+    """
+    if average is None:
+        return DEFAULT_DRIVER_RATING
+    return round(float(average), 1)
+
+
+def _route_detail(
+    route: Route,
+    driver_name: str,
+    vehicle_info: str,
+    bookings_count: int,
+    driver_rating: Optional[float]
+) -> RouteDetailResponse:
+    """
+    Build a route detail response from one joined row without re-validating it
+    """
+    return RouteDetailResponse.model_construct(
+        id=route.id,
+        driver_id=route.driver_id,
+        vehicle_id=route.vehicle_id,
+        start_location=route.start_location,
+        end_location=route.end_location,
+        bus_stops=route.bus_stops or [],
+        departure_time=route.departure_time,
+        departure_date=route.departure_date,
+        available_seats=route.available_seats,
+        price_per_seat=route.price_per_seat,
+        status=route.status.value,
+        created_at=route.created_at,
+        driver_name=driver_name,
+        driver_rating=_rating_or_default(driver_rating),
+        vehicle_info=vehicle_info,
+        bookings_count=bookings_count
+    )
+
+
+def _parse_time_range(time_range: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Split "HH:MM-HH:MM" into (start, end) minutes since midnight
+    
+    Returns None for a missing or malformed range, which disables the filter
+    """
+    if not time_range or "-" not in time_range:
+        return None
+    
+    bounds = []
+    for part in time_range.split("-", 1):
+        try:
+            hours, minutes = map(int, part.strip().split(":"))
+        except ValueError:
+            return None
+        if not (0 <= hours <= 23 and 0 <= minutes <= 59):
+            return None
+        bounds.append(hours * 60 + minutes)
+    
+    return bounds[0], bounds[1]
+
+
+async def create_route(route_data: RouteCreate, driver: UserResponse, db: AsyncSession) -> RouteResponse:
     """
     Create a new route for a driver
     """
-    # Verify vehicle belongs to driver
-    vehicle = db.query(Vehicle).filter(
-        and_(Vehicle.id == route_data.vehicle_id, Vehicle.user_id == driver.id)
-    ).first()
+    # Verify vehicle belongs to driver. The row lock holds until the insert
+    # commits, so the vehicle can't be deleted or reassigned in between
+    vehicle = (await db.execute(
+        select(Vehicle.id, Vehicle.total_seats).where(
+            and_(Vehicle.id == route_data.vehicle_id, Vehicle.user_id == driver.id)
+        ).with_for_update()
+    )).first()
     
     if not vehicle:
         raise NotFoundException("Vehicle not found or doesn't belong to you")
@@ -47,48 +157,38 @@ def create_route(route_data: RouteCreate, driver: User, db: Session) -> RouteRes
     )
     
     db.add(new_route)
-    db.commit()
-    db.refresh(new_route)
+    await db.commit()
+    search_cache.clear()
+    await db.refresh(new_route)
     
-    return RouteResponse.from_orm(new_route)
+    return RouteResponse.model_validate(new_route)
 
 
-def get_route_by_id(route_id: UUID, db: Session) -> RouteDetailResponse:
+async def get_route_by_id(route_id: UUID, db: AsyncSession) -> RouteDetailResponse:
     """
     Get detailed route information
     """
-    route = db.query(Route).filter(Route.id == route_id).first()
+    # Route, driver name, vehicle description, bookings count and driver
+    # rating in one query
+    row = (await db.execute(
+        select(
+            Route,
+            User.name.label("driver_name"),
+            (VEHICLE_INFO.element + " (" + Vehicle.plate_number + ")").label("vehicle_info"),
+            CONFIRMED_BOOKINGS_COUNT,
+            DRIVER_RATING
+        ).join(User, Route.driver_id == User.id).join(Vehicle, Route.vehicle_id == Vehicle.id).where(
+            Route.id == route_id
+        )
+    )).first()
     
-    if not route:
+    if not row:
         raise NotFoundException("Route not found")
     
-    # Get driver info
-    driver = route.driver
-    
-    # Get vehicle info
-    vehicle = route.vehicle
-    vehicle_info = f"{vehicle.color} {vehicle.make} {vehicle.model} ({vehicle.plate_number})"
-    
-    # Calculate bookings count
-    bookings_count = db.query(Booking).filter(
-        and_(Booking.route_id == route_id, Booking.status == "confirmed")
-    ).count()
-    
-    # Calculate driver rating (mock for now)
-    driver_rating = 4.5  # In production, calculate from ratings table
-    
-    route_dict = {
-        **RouteResponse.from_orm(route).dict(),
-        "driver_name": driver.name,
-        "driver_rating": driver_rating,
-        "vehicle_info": vehicle_info,
-        "bookings_count": bookings_count
-    }
-    
-    return RouteDetailResponse(**route_dict)
+    return _route_detail(*row)
 
 
-def search_routes(search_params: RouteSearch, db: Session) -> List[RouteDetailResponse]:
+async def search_routes(search_params: RouteSearch, db: AsyncSession) -> bytes:
     """
     Search for available routes with AI-powered matching
     
@@ -98,10 +198,29 @@ def search_routes(search_params: RouteSearch, db: Session) -> List[RouteDetailRe
     3. Route efficiency (pickup/dropoff on direct path)
     4. Availability bonuses (seats, driver rating, verification)
     
-    Returns top matches sorted by AI match score
+    Returns top matches sorted by AI match score, already serialized as a
+    JSON list of RouteDetailResponse
     """
-    # Base query - only active routes with available seats
-    query = db.query(Route).filter(
+    cache_key = (
+        search_params.from_location,
+        search_params.to_location,
+        search_params.time_range,
+        search_params.date
+    )
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    # Base query - only active routes with available seats. Driver name and
+    # vehicle details come back as plain columns on the same row
+    query = select(
+        Route,
+        User.name.label("driver_name"),
+        VEHICLE_INFO,
+        Vehicle.is_verified,
+        CONFIRMED_BOOKINGS_COUNT,
+        DRIVER_RATING
+    ).join(User, Route.driver_id == User.id).join(Vehicle, Route.vehicle_id == Vehicle.id).where(
         and_(
             Route.status == RouteStatus.ACTIVE,
             Route.available_seats > 0
@@ -110,55 +229,49 @@ def search_routes(search_params: RouteSearch, db: Session) -> List[RouteDetailRe
     
     # Filter by date if provided
     if search_params.date:
-        query = query.filter(Route.departure_date >= search_params.date)
+        query = query.where(Route.departure_date >= search_params.date)
     else:
         # Default to today and future
-        query = query.filter(Route.departure_date >= datetime.utcnow().date())
+        query = query.where(Route.departure_date >= datetime.utcnow().date())
+    
+    # Filter by time range in SQL on the integer minutes column. A range like
+    # "22:00-02:00" wraps midnight
+    time_bounds = _parse_time_range(search_params.time_range)
+    if time_bounds:
+        start, end = time_bounds
+        if start <= end:
+            query = query.where(Route.departure_minutes.between(start, end))
+        else:
+            query = query.where(or_(Route.departure_minutes >= start, Route.departure_minutes <= end))
     
-    routes = query.all()
+    rows = (await db.execute(query)).all()
     
     # Convert to list of dicts for AI ranking
     routes_list = []
-    for route in routes:
-        driver = route.driver
-        vehicle = route.vehicle
-        vehicle_info = f"{vehicle.color} {vehicle.make} {vehicle.model}"
-        
-        # Calculate confirmed bookings
-        bookings_count = db.query(Booking).filter(
-            and_(Booking.route_id == route.id, Booking.status == "confirmed")
-        ).count()
-        
-        # Get driver rating (calculate average from ratings table in production)
-        # For now, using mock rating
-        driver_rating = 4.5
-        
+    for route, driver_name, vehicle_info, is_verified, bookings_count, driver_rating in rows:
+        # Native values: the ranking only reads locations, time, seats, rating
+        # and verification, so ids and dates aren't stringified and re-parsed
         route_dict = {
-            "id": str(route.id),
-            "driver_id": str(route.driver_id),
-            "vehicle_id": str(route.vehicle_id),
+            "id": route.id,
+            "driver_id": route.driver_id,
+            "vehicle_id": route.vehicle_id,
             "start_location": route.start_location,
             "end_location": route.end_location,
             "bus_stops": route.bus_stops or [],
             "departure_time": route.departure_time,
-            "departure_date": route.departure_date.isoformat(),
+            "departure_date": route.departure_date,
             "available_seats": route.available_seats,
             "price_per_seat": route.price_per_seat,
             "status": route.status.value,
-            "created_at": route.created_at.isoformat(),
-            "driver_name": driver.name,
-            "driver_rating": driver_rating,
-            "is_verified": vehicle.is_verified,
+            "created_at": route.created_at,
+            "driver_name": driver_name,
+            "driver_rating": _rating_or_default(driver_rating),
+            "is_verified": is_verified,
             "vehicle_info": vehicle_info,
             "bookings_count": bookings_count
         }
         
-        # Filter by time range if provided
-        if search_params.time_range:
-            if is_time_in_range(route.departure_time, search_params.time_range):
-                routes_list.append(route_dict)
-        else:
-            routes_list.append(route_dict)
+        routes_list.append(route_dict)
     
     # Apply AI-powered ranking algorithm
     # This uses sophisticated matching considering location, time, efficiency, and bonuses
@@ -167,94 +280,100 @@ def search_routes(search_params: RouteSearch, db: Session) -> List[RouteDetailRe
         search_params.from_location, 
         search_params.to_location,
         search_time="",  # Can be extracted from time_range
-        time_range=search_params.time_range
+        time_range=search_params.time_range,
+        limit=SEARCH_RESULT_LIMIT,
+        detailed=False  # the response model only carries the ranked order
     )
     
-    # Return top matches (limit to top 20 for performance)
-    top_matches = ranked_routes[:20]
+    # Convert the top matches back to Pydantic models. Values come straight
+    # from the database, so skip re-validation (ranking keys are dropped)
+    results = [RouteDetailResponse.model_construct(**route) for route in ranked_routes]
+    body = RouteDetailListAdapter.dump_json(results)
+    search_cache.set(cache_key, body)
     
-    # Convert back to Pydantic models
-    return [RouteDetailResponse(**route) for route in top_matches]
+    return body
 
 
-def get_driver_routes(driver: User, db: Session) -> List[RouteDetailResponse]:
+async def get_driver_routes(driver: UserResponse, db: AsyncSession) -> List[RouteDetailResponse]:
     """
     Get all routes for a specific driver
     """
-    routes = db.query(Route).filter(Route.driver_id == driver.id).order_by(Route.created_at.desc()).all()
-    
-    result = []
-    for route in routes:
-        vehicle = route.vehicle
-        vehicle_info = f"{vehicle.color} {vehicle.make} {vehicle.model}"
-        
-        bookings_count = db.query(Booking).filter(
-            and_(Booking.route_id == route.id, Booking.status == "confirmed")
-        ).count()
-        
-        route_dict = {
-            **RouteResponse.from_orm(route).dict(),
-            "driver_name": driver.name,
-            "driver_rating": 4.5,
-            "vehicle_info": vehicle_info,
-            "bookings_count": bookings_count
-        }
-        
-        result.append(RouteDetailResponse(**route_dict))
+    # Driver is already known; the vehicle description and per-route
+    # aggregates come back on each route row
+    rows = (await db.execute(
+        select(Route, VEHICLE_INFO, CONFIRMED_BOOKINGS_COUNT, DRIVER_RATING).join(
+            Vehicle, Route.vehicle_id == Vehicle.id
+        ).where(Route.driver_id == driver.id).order_by(Route.created_at.desc())
+    )).all()
     
-    return result
+    return [
+        _route_detail(route, driver.name, vehicle_info, bookings_count, driver_rating)
+        for route, vehicle_info, bookings_count, driver_rating in rows
+    ]
 
 
-def update_route(route_id: UUID, route_data: RouteUpdate, driver: User, db: Session) -> RouteResponse:
+async def update_route(route_id: UUID, route_data: RouteUpdate, driver: UserResponse, db: AsyncSession) -> RouteResponse:
     """
     Update route details
     """
-    route = db.query(Route).filter(
-        and_(Route.id == route_id, Route.driver_id == driver.id)
-    ).first()
-    
-    if not route:
-        raise NotFoundException("Route not found or you don't have permission to update it")
-    
     # Update fields
+    values = {}
     if route_data.available_seats is not None:
-        route.available_seats = route_data.available_seats
+        values["available_seats"] = route_data.available_seats
     
     if route_data.price_per_seat is not None:
-        route.price_per_seat = route_data.price_per_seat
+        values["price_per_seat"] = route_data.price_per_seat
     
     if route_data.status is not None:
-        route.status = RouteStatus(route_data.status)
+        values["status"] = RouteStatus(route_data.status)
+    
+    owned_route = and_(Route.id == route_id, Route.driver_id == driver.id)
+    if values:
+        # Ownership check, update and read-back in one statement
+        route = (await db.execute(
+            update(Route).where(owned_route).values(**values).returning(Route)
+        )).scalar_one_or_none()
+    else:
+        route = (await db.execute(select(Route).where(owned_route))).scalars().first()
+    
+    if not route:
+        await db.rollback()
+        raise NotFoundException("Route not found or you don't have permission to update it")
     
-    db.commit()
-    db.refresh(route)
+    response = RouteResponse.model_validate(route)
+    await db.commit()
+    search_cache.clear()
     
-    return RouteResponse.from_orm(route)
+    return response
 
 
-def delete_route(route_id: UUID, driver: User, db: Session) -> dict:
+async def delete_route(route_id: UUID, driver: UserResponse, db: AsyncSession) -> dict:
     """
     Delete/cancel a route
     """
-    route = db.query(Route).filter(
-        and_(Route.id == route_id, Route.driver_id == driver.id)
-    ).first()
+    route = (await db.execute(
+        select(Route).where(and_(Route.id == route_id, Route.driver_id == driver.id))
+    )).scalars().first()
     
     if not route:
         raise NotFoundException("Route not found or you don't have permission to delete it")
     
-    # Check if there are confirmed bookings
-    confirmed_bookings = db.query(Booking).filter(
-        and_(Booking.route_id == route_id, Booking.status == "confirmed")
-    ).count()
+    # Check if there are confirmed bookings (EXISTS stops at the first match)
+    has_confirmed_bookings = (await db.execute(
+        select(exists().where(
+            and_(Booking.route_id == route_id, Booking.status == BookingStatus.CONFIRMED)
+        ))
+    )).scalar()
     
-    if confirmed_bookings > 0:
+    if has_confirmed_bookings:
         # Don't delete, just cancel
         route.status = RouteStatus.CANCELLED
-        db.commit()
+        await db.commit()
+        search_cache.clear()
         return {"message": "Route cancelled successfully", "cancelled": True}
     else:
         # No bookings, safe to delete
-        db.delete(route)
-        db.commit()
+        await db.delete(route)
+        await db.commit()
+        search_cache.clear()
         return {"message": "Route deleted successfully", "deleted": True}
@@ -1,23 +1,26 @@
 """
 Vehicle controller for managing vehicles
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, exists, select
 from typing import List
 from uuid import UUID
 
 from ..models.vehicle import Vehicle
-from ..models.user import User
+from ..schemas.user_schema import UserResponse
 from ..schemas.vehicle_schema import VehicleCreate, VehicleUpdate, VehicleResponse
 from ..middleware.error_handler import NotFoundException, BadRequestException
+from .route_controller import search_cache
 
 
-def create_vehicle(vehicle_data: VehicleCreate, driver: User, db: Session) -> VehicleResponse:
+async def create_vehicle(vehicle_data: VehicleCreate, driver: UserResponse, db: AsyncSession) -> VehicleResponse:
     """
     Register a new vehicle
     """
     # Check if plate number already exists
-    existing_vehicle = db.query(Vehicle).filter(Vehicle.plate_number == vehicle_data.plate_number).first()
+    existing_vehicle = (await db.execute(
+        select(Vehicle.id).where(Vehicle.plate_number == vehicle_data.plate_number)
+    )).first()
     if existing_vehicle:
         raise BadRequestException("Vehicle with this plate number already registered")
     
@@ -33,41 +36,41 @@ def create_vehicle(vehicle_data: VehicleCreate, driver: User, db: Session) -> Ve
     )
     
     db.add(new_vehicle)
-    db.commit()
-    db.refresh(new_vehicle)
+    await db.commit()
+    await db.refresh(new_vehicle)
     
-    return VehicleResponse.from_orm(new_vehicle)
+    return VehicleResponse.model_validate(new_vehicle)
 
 
-def get_user_vehicles(driver: User, db: Session) -> List[VehicleResponse]:
+async def get_user_vehicles(driver: UserResponse, db: AsyncSession) -> List[VehicleResponse]:
     """
     Get all vehicles for a driver
     """
-    vehicles = db.query(Vehicle).filter(Vehicle.user_id == driver.id).all()
-    return [VehicleResponse.from_orm(vehicle) for vehicle in vehicles]
+    vehicles = (await db.execute(select(Vehicle).where(Vehicle.user_id == driver.id))).scalars().all()
+    return [VehicleResponse.model_validate(vehicle) for vehicle in vehicles]
 
 
-def get_vehicle_by_id(vehicle_id: UUID, driver: User, db: Session) -> VehicleResponse:
+async def get_vehicle_by_id(vehicle_id: UUID, driver: UserResponse, db: AsyncSession) -> VehicleResponse:
     """
     Get a specific vehicle
     """
-    vehicle = db.query(Vehicle).filter(
-        and_(Vehicle.id == vehicle_id, Vehicle.user_id == driver.id)
-    ).first()
+    vehicle = (await db.execute(
+        select(Vehicle).where(and_(Vehicle.id == vehicle_id, Vehicle.user_id == driver.id))
+    )).scalars().first()
     
     if not vehicle:
         raise NotFoundException("Vehicle not found")
     
-    return VehicleResponse.from_orm(vehicle)
+    return VehicleResponse.model_validate(vehicle)
 
 
-def update_vehicle(vehicle_id: UUID, vehicle_data: VehicleUpdate, driver: User, db: Session) -> VehicleResponse:
+async def update_vehicle(vehicle_id: UUID, vehicle_data: VehicleUpdate, driver: UserResponse, db: AsyncSession) -> VehicleResponse:
     """
     Update vehicle information
     """
-    vehicle = db.query(Vehicle).filter(
-        and_(Vehicle.id == vehicle_id, Vehicle.user_id == driver.id)
-    ).first()
+    vehicle = (await db.execute(
+        select(Vehicle).where(and_(Vehicle.id == vehicle_id, Vehicle.user_id == driver.id))
+    )).scalars().first()
     
     if not vehicle:
         raise NotFoundException("Vehicle not found")
@@ -79,33 +82,36 @@ def update_vehicle(vehicle_id: UUID, vehicle_data: VehicleUpdate, driver: User,
     if vehicle_data.total_seats:
         vehicle.total_seats = vehicle_data.total_seats
     
-    db.commit()
-    db.refresh(vehicle)
+    await db.commit()
+    search_cache.clear()  # Search results embed vehicle details
+    await db.refresh(vehicle)
     
-    return VehicleResponse.from_orm(vehicle)
+    return VehicleResponse.model_validate(vehicle)
 
 
-def delete_vehicle(vehicle_id: UUID, driver: User, db: Session) -> dict:
+async def delete_vehicle(vehicle_id: UUID, driver: UserResponse, db: AsyncSession) -> dict:
     """
     Delete a vehicle
     """
-    vehicle = db.query(Vehicle).filter(
-        and_(Vehicle.id == vehicle_id, Vehicle.user_id == driver.id)
-    ).first()
+    vehicle = (await db.execute(
+        select(Vehicle).where(and_(Vehicle.id == vehicle_id, Vehicle.user_id == driver.id))
+    )).scalars().first()
     
     if not vehicle:
         raise NotFoundException("Vehicle not found")
     
     # Check if vehicle has active routes
     from ..models.route import Route, RouteStatus
-    active_routes = db.query(Route).filter(
-        and_(Route.vehicle_id == vehicle_id, Route.status == RouteStatus.ACTIVE)
-    ).count()
+    has_active_routes = (await db.execute(
+        select(exists().where(
+            and_(Route.vehicle_id == vehicle_id, Route.status == RouteStatus.ACTIVE)
+        ))
+    )).scalar()
     
-    if active_routes > 0:
+    if has_active_routes:
         raise BadRequestException("Cannot delete vehicle with active routes")
     
-    db.delete(vehicle)
-    db.commit()
+    await db.delete(vehicle)
+    await db.commit()
     
     return {"message": "Vehicle deleted successfully"}
@@ -3,38 +3,96 @@ Authentication middleware for JWT token verification
 """
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from typing import Optional
 from uuid import UUID
+import time
 
-from ..config.database import get_db
+from ..config.database import AsyncSessionLocal
+from ..config.settings import get_settings
 from ..models.user import User
+from ..schemas.user_schema import UserResponse
 from ..utils.auth import decode_access_token
+from ..utils.cache import TTLCache
 
 security = HTTPBearer()
+settings = get_settings()
 
+# Detached user snapshots keyed by the token subject, so authenticated
+# requests skip the user lookup while the entry is fresh
+user_cache = TTLCache(ttl_seconds=settings.USER_CACHE_TTL_SECONDS, maxsize=10_000)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
+# Verified token subjects keyed by the raw token, so repeat requests skip the
+# JWT signature check. Each entry also carries the token's own expiry
+token_cache = TTLCache(ttl_seconds=settings.TOKEN_CACHE_TTL_SECONDS, maxsize=50_000)
+
+# Only the columns the snapshot carries (never password_hash)
+SNAPSHOT_COLUMNS = tuple(getattr(User, name) for name in UserResponse.model_fields)
+
+
+def _get_token_subject(token: str) -> Optional[str]:
     """
-    Get current authenticated user from JWT token
+    Return the user ID a valid token was issued for, or None
+    
+    Only successfully verified tokens are cached, and a cached token stops
+    matching once its exp has passed (just as jwt.decode would reject it)
     """
-    token = credentials.credentials
+    cached = token_cache.get(token)
+    if cached is not None:
+        user_id, expires_at = cached
+        if expires_at > time.time():
+            return user_id
+        token_cache.delete(token)
+        return None
     
-    # Decode token
     payload = decode_access_token(token)
-    
     if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        return None
+    
+    user_id = payload.get("sub")
+    if user_id is None:
+        return None
+    
+    token_cache.set(token, (user_id, payload.get("exp", float("inf"))))
+    return user_id
+
+
+async def _get_user_snapshot(user_id: str) -> Optional[UserResponse]:
+    """
+    Return the user for a token subject, from cache when possible
+    
+    The snapshot is a plain response model rather than an ORM object, so it is
+    safe to share across requests and sessions. A session is only opened on a
+    cache miss, and closed again before the handler runs
+    """
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    
+    # A subject that isn't a UUID can't match any user
+    try:
+        uid = UUID(user_id)
+    except (AttributeError, TypeError, ValueError):
+        return None
     
-    # Get user ID from payload
-    user_id: Optional[str] = payload.get("sub")
+    async with AsyncSessionLocal() as db:
+        row = (await db.execute(select(*SNAPSHOT_COLUMNS).where(User.id == uid))).first()
+    if row is None:
+        return None
+    
+    user = UserResponse.model_validate(row)
+    user_cache.set(user_id, user)
+    return user
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+) -> UserResponse:
+    """
+    Get current authenticated user from JWT token
+    """
+    # Verify token and get user ID (cached per token)
+    user_id = _get_token_subject(credentials.credentials)
     
     if user_id is None:
         raise HTTPException(
@@ -43,8 +101,8 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Get user from database
-    user = db.query(User).filter(User.id == UUID(user_id)).first()
+    # Get user (cached snapshot or database)
+    user = await _get_user_snapshot(user_id)
     
     if user is None:
         raise HTTPException(
@@ -56,7 +114,7 @@ async def get_current_user(
     return user
 
 
-async def get_current_driver(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_driver(current_user: UserResponse = Depends(get_current_user)) -> UserResponse:
     """
     Ensure current user is a driver
     """
@@ -69,7 +127,7 @@ async def get_current_driver(current_user: User = Depends(get_current_user)) ->
     return current_user
 
 
-async def get_current_rider(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_rider(current_user: UserResponse = Depends(get_current_user)) -> UserResponse:
     """
     Ensure current user is a rider
     """
@@ -83,27 +141,18 @@ async def get_current_rider(current_user: User = Depends(get_current_user)) -> U
 
 
 async def get_optional_user(
-    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False)),
-    db: Session = Depends(get_db)
-) -> Optional[User]:
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(HTTPBearer(auto_error=False))
+) -> Optional[UserResponse]:
     """
     Get current user if authenticated, otherwise return None
     """
     if credentials is None:
         return None
     
-    try:
-        token = credentials.credentials
-        payload = decode_access_token(token)
-        
-        if payload is None:
-            return None
-        
-        user_id = payload.get("sub")
-        if user_id is None:
-            return None
-        
-        user = db.query(User).filter(User.id == UUID(user_id)).first()
-        return user
-    except Exception:
+    # Invalid tokens and subjects mean "anonymous"; database errors propagate
+    # to the error handler instead of silently dropping authentication
+    user_id = _get_token_subject(credentials.credentials)
+    if user_id is None:
         return None
+    
+    return await _get_user_snapshot(user_id)
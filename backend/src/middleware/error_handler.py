@@ -1,8 +1,15 @@
 """
 Error handling middleware and exception handlers
+
+These are plain Starlette exception handlers registered with
+app.add_exception_handler - they only run when an exception is raised,
+so they add no per-request cost. Any request-wrapping middleware added
+later should be written as a pure ASGI class (__call__(scope, receive, send))
+rather than a BaseHTTPMiddleware subclass, which allocates extra
+memory streams and a task group on every request.
 """
 from fastapi import Request, status
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from fastapi.exceptions import RequestValidationError
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Union
@@ -48,7 +55,7 @@ class ConflictException(OpenRideException):
 
 async def openride_exception_handler(request: Request, exc: OpenRideException):
     """Handle OpenRide custom exceptions"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "error": True,
@@ -60,15 +67,16 @@ async def openride_exception_handler(request: Request, exc: OpenRideException):
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors"""
-    errors = []
-    for error in exc.errors():
-        errors.append({
-            "field": ".".join(str(x) for x in error["loc"][1:]),
+    errors = [
+        {
+            "field": ".".join(map(str, error["loc"][1:])),
             "message": error["msg"],
             "type": error["type"]
-        })
+        }
+        for error in exc.errors()
+    ]
     
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "error": True,
@@ -81,7 +89,7 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 async def database_exception_handler(request: Request, exc: SQLAlchemyError):
     """Handle database errors"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": True,
@@ -93,7 +101,7 @@ async def database_exception_handler(request: Request, exc: SQLAlchemyError):
 
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle general exceptions"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": True,
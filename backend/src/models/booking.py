@@ -1,15 +1,23 @@
 """
 Booking model for OpenRide platform
 """
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import enum
 from ..config.database import Base
 
 
+# Booking tokens (QR codes) can be redeemed for 24 hours after the booking is made
+TOKEN_VALIDITY = timedelta(hours=24)
+
+
+def _token_expiry() -> datetime:
+    return datetime.utcnow() + TOKEN_VALIDITY
+
+
 class BookingStatus(str, enum.Enum):
     PENDING = "pending"
     CONFIRMED = "confirmed"
@@ -28,7 +36,8 @@ class Booking(Base):
     total_amount = Column(Float, nullable=False)
     
     payment_status = Column(String(50), nullable=False, default="pending")
-    blockchain_token = Column(String(500), nullable=True)  # Token hash for verification
+    blockchain_token = Column(String(500), nullable=True, index=True)  # Token hash for verification
+    token_expires_at = Column(DateTime, nullable=True, default=_token_expiry, index=True)
     
     pickup_stop = Column(String(255), nullable=False)
     dropoff_stop = Column(String(255), nullable=False)
@@ -43,5 +52,13 @@ class Booking(Base):
     rider = relationship("User", back_populates="bookings", foreign_keys=[rider_id])
     payment = relationship("Payment", back_populates="booking", uselist=False, cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Route booking lists and seat/status checks filter on both columns
+        Index("ix_bookings_route_id_status", "route_id", "status"),
+        # Keyset pagination of rider and route booking lists (newest first)
+        Index("ix_bookings_rider_id_created_at", "rider_id", "created_at", "id"),
+        Index("ix_bookings_route_id_created_at", "route_id", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Booking {self.id} - {self.seats_booked} seat(s)>"
@@ -1,7 +1,7 @@
 """
 Route model for OpenRide platform
 """
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import Column, String, Integer, SmallInteger, Float, DateTime, ForeignKey, Index, Enum as SQLEnum, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 import uuid
@@ -17,6 +17,17 @@ class RouteStatus(str, enum.Enum):
     CANCELLED = "cancelled"
 
 
+def departure_time_to_minutes(departure_time: str) -> int:
+    """Convert "HH:MM" to minutes since midnight"""
+    hours, minutes = departure_time.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _departure_minutes(context) -> int:
+    # Derived from departure_time on insert (ORM and Core executemany alike)
+    return departure_time_to_minutes(context.get_current_parameters()["departure_time"])
+
+
 class Route(Base):
     __tablename__ = "routes"
     
@@ -28,7 +39,8 @@ class Route(Base):
     end_location = Column(String(255), nullable=False, index=True)
     bus_stops = Column(JSON, default=list)  # List of bus stop names
     
-    departure_time = Column(String(10), nullable=False)  # Format: "06:30"
+    departure_time = Column(String(10), nullable=False)  # Format: "06:30" (API/display value)
+    departure_minutes = Column(SmallInteger, nullable=True, default=_departure_minutes)  # 0-1439, used for filtering
     departure_date = Column(DateTime, nullable=False, index=True)
     
     available_seats = Column(Integer, nullable=False)
@@ -47,5 +59,18 @@ class Route(Base):
     vehicle = relationship("Vehicle", back_populates="routes")
     bookings = relationship("Booking", back_populates="route", cascade="all, delete-orphan")
     
+    __table_args__ = (
+        # Route search filters on status and date, then range-scans departure time
+        Index("ix_routes_status_date_minutes", "status", "departure_date", "departure_minutes"),
+        # Partial index matching the search predicate exactly: only bookable routes
+        Index(
+            "ix_routes_active_minutes",
+            "departure_date",
+            "departure_minutes",
+            postgresql_where=(status == RouteStatus.ACTIVE) & (available_seats > 0),
+            sqlite_where=(status == RouteStatus.ACTIVE) & (available_seats > 0),
+        ),
+    )
+    
     def __repr__(self):
         return f"<Route {self.start_location} -> {self.end_location} at {self.departure_time}>"
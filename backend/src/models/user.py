@@ -1,7 +1,7 @@
 """
 User model for OpenRide platform
 """
-from sqlalchemy import Column, String, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, String, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
@@ -22,7 +22,7 @@ class User(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
     name = Column(String(255), nullable=False)
     email = Column(String(255), unique=True, nullable=False, index=True)
-    phone = Column(String(20), nullable=False)
+    phone = Column(String(20), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     role = Column(SQLEnum(UserRole), nullable=False, default=UserRole.RIDER)
     profile_image = Column(String(500), nullable=True)
@@ -38,5 +38,10 @@ class User(Base):
     ratings_given = relationship("Rating", back_populates="rater", foreign_keys="Rating.rater_id")
     ratings_received = relationship("Rating", back_populates="rated_user", foreign_keys="Rating.rated_user_id")
     
+    __table_args__ = (
+        # Lets the login lookup (id, password_hash by email) be answered from the index alone on PostgreSQL
+        Index("ix_users_email_login", "email", postgresql_include=["id", "password_hash"]),
+    )
+    
     def __repr__(self):
         return f"<User {self.email}>"
@@ -1,19 +1,19 @@
 """
 Booking management routes
 """
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Query, Response, status
+from typing import List, Optional
 from uuid import UUID
 
-from ..config.database import get_db
+from ..config.database import AsyncSessionLocal
 from ..schemas.booking_schema import (
     BookingCreate, 
     BookingUpdate, 
     BookingResponse, 
     BookingDetailResponse,
     BookingWithTokenResponse,
-    BookingVerificationResponse
+    BookingVerificationResponse,
+    BookingDetailListAdapter
 )
 from ..controllers.booking_controller import (
     create_booking,
@@ -23,19 +23,34 @@ from ..controllers.booking_controller import (
     update_booking,
     cancel_booking,
     verify_booking_by_token,
-    redeem_booking_token
+    redeem_booking_token,
+    next_booking_cursor,
+    BOOKING_PAGE_SIZE,
+    MAX_BOOKING_PAGE_SIZE
 )
 from ..middleware.auth_middleware import get_current_user, get_current_rider, get_current_driver
-from ..models.user import User
+from ..schemas.user_schema import UserResponse
 
 router = APIRouter(prefix="/api/bookings", tags=["Bookings"])
 
 
+def _booking_page_response(bookings: List[BookingDetailResponse], limit: int) -> Response:
+    """
+    Serialize a page of bookings, pointing to the next page in X-Next-Cursor
+    
+    Rows are built with model_construct, so FastAPI's re-validation pass is skipped
+    """
+    response = Response(BookingDetailListAdapter.dump_json(bookings), media_type="application/json")
+    cursor = next_booking_cursor(bookings, limit)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
+    return response
+
+
 @router.post("", response_model=BookingWithTokenResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_booking(
     booking_data: BookingCreate,
-    current_rider: User = Depends(get_current_rider),
-    db: Session = Depends(get_db)
+    current_rider: UserResponse = Depends(get_current_rider)
 ):
     """
     Create a new booking with blockchain token generation (riders only)
@@ -48,80 +63,90 @@ async def create_new_booking(
     The token prevents double booking and provides cryptographic verification.
     Riders receive a QR code containing the token for driver scanning.
     """
-    return create_booking(booking_data, current_rider, db)
+    async with AsyncSessionLocal() as db:
+        return await create_booking(booking_data, current_rider, db)
 
 
 @router.get("/user/{user_id}", response_model=List[BookingDetailResponse])
 async def get_user_booking_list(
     user_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(BOOKING_PAGE_SIZE, ge=1, le=MAX_BOOKING_PAGE_SIZE),
+    after: Optional[str] = None,
+    current_user: UserResponse = Depends(get_current_user)
 ):
     """
-    Get all bookings for a user
+    Get a user's bookings, newest first
+    
+    Pass the X-Next-Cursor response header back as `after` for the next page
     """
     # Ensure user can only view their own bookings
-    if str(current_user.id) != str(user_id):
+    if current_user.id != user_id:
         from ..middleware.error_handler import ForbiddenException
         raise ForbiddenException("You can only view your own bookings")
     
-    return get_user_bookings(current_user, db)
+    async with AsyncSessionLocal() as db:
+        bookings = await get_user_bookings(current_user, db, limit, after)
+    return _booking_page_response(bookings, limit)
 
 
 @router.get("/route/{route_id}", response_model=List[BookingDetailResponse])
 async def get_route_booking_list(
     route_id: UUID,
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    limit: int = Query(BOOKING_PAGE_SIZE, ge=1, le=MAX_BOOKING_PAGE_SIZE),
+    after: Optional[str] = None,
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
-    Get all bookings for a specific route (drivers only)
+    Get bookings for a specific route, newest first (drivers only)
+    
+    Pass the X-Next-Cursor response header back as `after` for the next page
     """
-    return get_route_bookings(route_id, current_driver, db)
+    async with AsyncSessionLocal() as db:
+        bookings = await get_route_bookings(route_id, current_driver, db, limit, after)
+    return _booking_page_response(bookings, limit)
 
 
 @router.get("/{booking_id}", response_model=BookingDetailResponse)
 async def get_booking(
     booking_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user)
 ):
     """
     Get booking details by ID
     """
-    return get_booking_by_id(booking_id, current_user, db)
+    async with AsyncSessionLocal() as db:
+        booking = await get_booking_by_id(booking_id, current_user, db)
+    # Built with model_construct, so skip FastAPI's re-validation pass
+    return Response(booking.model_dump_json(), media_type="application/json")
 
 
 @router.patch("/{booking_id}", response_model=BookingResponse)
 async def update_booking_status(
     booking_id: UUID,
     booking_data: BookingUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user)
 ):
     """
     Update booking status
     """
-    return update_booking(booking_id, booking_data, current_user, db)
+    async with AsyncSessionLocal() as db:
+        return await update_booking(booking_id, booking_data, current_user, db)
 
 
 @router.delete("/{booking_id}")
 async def cancel_booking_endpoint(
     booking_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user)
 ):
     """
     Cancel a booking
     """
-    return cancel_booking(booking_id, current_user, db)
+    async with AsyncSessionLocal() as db:
+        return await cancel_booking(booking_id, current_user, db)
 
 
 @router.get("/{booking_id}/verify", response_model=BookingVerificationResponse)
-async def verify_booking_token_endpoint(
-    booking_id: UUID,
-    db: Session = Depends(get_db)
-):
+async def verify_booking_token_endpoint(booking_id: UUID):
     """
     Verify booking blockchain token for QR scanning
     
@@ -143,14 +168,13 @@ async def verify_booking_token_endpoint(
     - Token verification status
     - QR data for display
     """
-    return verify_booking_by_token(booking_id, db)
+    return await verify_booking_by_token(booking_id)
 
 
 @router.post("/{booking_id}/redeem")
 async def redeem_booking_token_endpoint(
     booking_id: UUID,
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
     Redeem booking token after rider boards (drivers only)
@@ -174,4 +198,5 @@ async def redeem_booking_token_endpoint(
     - Rider details
     - Redemption timestamp
     """
-    return redeem_booking_token(booking_id, current_driver, db)
+    async with AsyncSessionLocal() as db:
+        return await redeem_booking_token(booking_id, current_driver, db)
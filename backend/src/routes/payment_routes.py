@@ -2,11 +2,10 @@
 Payment processing routes
 """
 from fastapi import APIRouter, Depends, status, Header
-from sqlalchemy.orm import Session
 from uuid import UUID
 from typing import Optional
 
-from ..config.database import get_db
+from ..config.database import AsyncSessionLocal
 from ..schemas.payment_schema import (
     PaymentInitiate, 
     PaymentInitializeResponse,
@@ -23,7 +22,7 @@ from ..controllers.payment_controller import (
     get_test_card_info
 )
 from ..middleware.auth_middleware import get_current_user
-from ..models.user import User
+from ..schemas.user_schema import UserResponse
 
 router = APIRouter(prefix="/api/payments", tags=["Payments"])
 
@@ -31,8 +30,7 @@ router = APIRouter(prefix="/api/payments", tags=["Payments"])
 @router.post("/initiate", status_code=status.HTTP_201_CREATED)
 async def initiate_payment(
     payment_data: PaymentInitiate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user)
 ):
     """
     Initialize payment with Interswitch
@@ -48,14 +46,12 @@ async def initiate_payment(
     
     Also returns test card information for demo purposes
     """
-    return await create_payment(payment_data, current_user, db)
+    async with AsyncSessionLocal() as db:
+        return await create_payment(payment_data, current_user, db)
 
 
 @router.post("/verify", response_model=PaymentVerifyResponse)
-async def verify_payment(
-    transaction_ref: str,
-    db: Session = Depends(get_db)
-):
+async def verify_payment(transaction_ref: str):
     """
     Verify payment status with Interswitch
     
@@ -69,14 +65,14 @@ async def verify_payment(
     - Generates blockchain token for booking
     - Reduces available seats on route
     """
-    return await verify_payment_transaction(transaction_ref, db)
+    # Opens its own session (the verification is shared by concurrent callers)
+    return await verify_payment_transaction(transaction_ref)
 
 
 @router.post("/webhook")
 async def payment_webhook(
     webhook_data: PaymentWebhook,
-    x_interswitch_signature: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
+    x_interswitch_signature: Optional[str] = Header(None)
 ):
     """
     Handle Interswitch payment webhook callback
@@ -84,19 +80,20 @@ async def payment_webhook(
     Validates webhook signature and processes payment status update
     Response code "00" indicates successful payment
     """
-    return await handle_payment_webhook(webhook_data, x_interswitch_signature, db)
+    async with AsyncSessionLocal() as db:
+        return await handle_payment_webhook(webhook_data, x_interswitch_signature, db)
 
 
 @router.get("/booking/{booking_id}", response_model=PaymentResponse)
 async def get_booking_payment(
     booking_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserResponse = Depends(get_current_user)
 ):
     """
     Get payment information for a booking
     """
-    return get_payment_by_booking(booking_id, current_user, db)
+    async with AsyncSessionLocal() as db:
+        return await get_payment_by_booking(booking_id, current_user, db)
 
 
 @router.get("/test-card", response_model=TestCardInfo)
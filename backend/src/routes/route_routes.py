@@ -1,12 +1,11 @@
 """
 Route management routes (for drivers)
 """
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Request, Response, status
+from typing import List, Optional
 from uuid import UUID
 
-from ..config.database import get_db
+from ..config.database import AsyncSessionLocal
 from ..schemas.route_schema import RouteCreate, RouteUpdate, RouteResponse, RouteDetailResponse, RouteSearch
 from ..controllers.route_controller import (
     create_route,
@@ -17,7 +16,8 @@ from ..controllers.route_controller import (
     delete_route
 )
 from ..middleware.auth_middleware import get_current_driver, get_optional_user
-from ..models.user import User
+from ..schemas.user_schema import UserResponse
+from ..utils.http_cache import conditional_json_response
 
 router = APIRouter(prefix="/api/routes", tags=["Routes"])
 
@@ -25,13 +25,13 @@ router = APIRouter(prefix="/api/routes", tags=["Routes"])
 @router.post("", response_model=RouteResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_route(
     route_data: RouteCreate,
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
     Create a new route (drivers only)
     """
-    return create_route(route_data, current_driver, db)
+    async with AsyncSessionLocal() as db:
+        return await create_route(route_data, current_driver, db)
 
 
 @router.get("/search", response_model=List[RouteDetailResponse])
@@ -39,8 +39,7 @@ async def search_available_routes(
     from_location: str,
     to_location: str,
     time: str = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_optional_user)
+    current_user: Optional[UserResponse] = Depends(get_optional_user)
 ):
     """
     Search for available routes
@@ -51,48 +50,56 @@ async def search_available_routes(
         to_location=to_location,
         time_range=time
     )
-    return search_routes(search_params, db)
+    async with AsyncSessionLocal() as db:
+        body = await search_routes(search_params, db)
+    # Already serialized (and cached) by the controller
+    return Response(body, media_type="application/json")
 
 
 @router.get("/my-routes", response_model=List[RouteDetailResponse])
 async def get_my_routes(
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
     Get all routes for the current driver
     """
-    return get_driver_routes(current_driver, db)
+    async with AsyncSessionLocal() as db:
+        return await get_driver_routes(current_driver, db)
 
 
 @router.get("/{route_id}", response_model=RouteDetailResponse)
-async def get_route(route_id: UUID, db: Session = Depends(get_db)):
+async def get_route(route_id: UUID, request: Request):
     """
     Get route details by ID
+    
+    Clients polling a trip can send If-None-Match with the last ETag to get
+    an empty 304 while nothing has changed
     """
-    return get_route_by_id(route_id, db)
+    async with AsyncSessionLocal() as db:
+        route = await get_route_by_id(route_id, db)
+    return conditional_json_response(request, route, "public, max-age=30")
 
 
 @router.patch("/{route_id}", response_model=RouteResponse)
 async def update_route_details(
     route_id: UUID,
     route_data: RouteUpdate,
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
     Update route details (drivers only)
     """
-    return update_route(route_id, route_data, current_driver, db)
+    async with AsyncSessionLocal() as db:
+        return await update_route(route_id, route_data, current_driver, db)
 
 
 @router.delete("/{route_id}")
 async def delete_route_endpoint(
     route_id: UUID,
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
     Delete or cancel a route (drivers only)
     """
-    return delete_route(route_id, current_driver, db)
+    async with AsyncSessionLocal() as db:
+        return await delete_route(route_id, current_driver, db)
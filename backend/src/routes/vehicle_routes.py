@@ -1,12 +1,11 @@
 """
 Vehicle management routes
 """
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Request, status
 from typing import List
 from uuid import UUID
 
-from ..config.database import get_db
+from ..config.database import AsyncSessionLocal
 from ..schemas.vehicle_schema import VehicleCreate, VehicleUpdate, VehicleResponse
 from ..controllers.vehicle_controller import (
     create_vehicle,
@@ -16,7 +15,8 @@ from ..controllers.vehicle_controller import (
     delete_vehicle
 )
 from ..middleware.auth_middleware import get_current_driver
-from ..models.user import User
+from ..schemas.user_schema import UserResponse
+from ..utils.http_cache import conditional_json_response
 
 router = APIRouter(prefix="/api/vehicles", tags=["Vehicles"])
 
@@ -24,58 +24,61 @@ router = APIRouter(prefix="/api/vehicles", tags=["Vehicles"])
 @router.post("", response_model=VehicleResponse, status_code=status.HTTP_201_CREATED)
 async def register_vehicle(
     vehicle_data: VehicleCreate,
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
     Register a new vehicle (drivers only)
     """
-    return create_vehicle(vehicle_data, current_driver, db)
+    async with AsyncSessionLocal() as db:
+        return await create_vehicle(vehicle_data, current_driver, db)
 
 
 @router.get("", response_model=List[VehicleResponse])
 async def get_my_vehicles(
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
     Get all vehicles for the current driver
     """
-    return get_user_vehicles(current_driver, db)
+    async with AsyncSessionLocal() as db:
+        return await get_user_vehicles(current_driver, db)
 
 
 @router.get("/{vehicle_id}", response_model=VehicleResponse)
 async def get_vehicle(
     vehicle_id: UUID,
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
-    Get vehicle details by ID
+    Get vehicle details by ID (ETag-validated, see get_route)
     """
-    return get_vehicle_by_id(vehicle_id, current_driver, db)
+    async with AsyncSessionLocal() as db:
+        vehicle = await get_vehicle_by_id(vehicle_id, current_driver, db)
+    # Owner-only data: browsers may reuse it, shared caches must not
+    return conditional_json_response(request, vehicle, "private, max-age=30")
 
 
 @router.patch("/{vehicle_id}", response_model=VehicleResponse)
 async def update_vehicle_details(
     vehicle_id: UUID,
     vehicle_data: VehicleUpdate,
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
     Update vehicle information
     """
-    return update_vehicle(vehicle_id, vehicle_data, current_driver, db)
+    async with AsyncSessionLocal() as db:
+        return await update_vehicle(vehicle_id, vehicle_data, current_driver, db)
 
 
 @router.delete("/{vehicle_id}")
 async def delete_vehicle_endpoint(
     vehicle_id: UUID,
-    current_driver: User = Depends(get_current_driver),
-    db: Session = Depends(get_db)
+    current_driver: UserResponse = Depends(get_current_driver)
 ):
     """
     Delete a vehicle
     """
-    return delete_vehicle(vehicle_id, current_driver, db)
+    async with AsyncSessionLocal() as db:
+        return await delete_vehicle(vehicle_id, current_driver, db)
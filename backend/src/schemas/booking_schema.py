@@ -1,8 +1,8 @@
 """
 Booking schemas for request/response validation
 """
-from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing import Optional, Dict, List, Literal
 from datetime import datetime
 from uuid import UUID
 
@@ -15,12 +15,11 @@ class BookingBase(BaseModel):
 
 
 class BookingCreate(BookingBase):
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class BookingUpdate(BaseModel):
-    status: Optional[str] = Field(None, pattern="^(pending|confirmed|cancelled|completed)$")
+    status: Optional[Literal["pending", "confirmed", "cancelled", "completed"]] = None
 
 
 class BlockchainTokenData(BaseModel):
@@ -47,13 +46,12 @@ class BookingVerificationResponse(BaseModel):
     status: str
     is_redeemed: bool
     is_expired: bool
-    qr_data: str
-    blockchain_token: BlockchainTokenData
+    qr_data: Optional[str] = None  # Only included while the token is still valid
+    blockchain_token: Optional[BlockchainTokenData] = None
     verified: bool
     message: str
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BookingResponse(BaseModel):
@@ -69,8 +67,7 @@ class BookingResponse(BaseModel):
     status: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BookingWithTokenResponse(BookingResponse):
@@ -86,3 +83,7 @@ class BookingDetailResponse(BookingResponse):
     to_location: str
     departure_time: str
     departure_date: datetime
+
+
+# Built once: serializes lists of already-constructed responses straight to JSON
+BookingDetailListAdapter = TypeAdapter(List[BookingDetailResponse])
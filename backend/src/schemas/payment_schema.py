@@ -1,7 +1,7 @@
 """
 Payment schemas for request/response validation
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any
 from datetime import datetime
 from uuid import UUID
@@ -26,8 +26,8 @@ class PaymentInitializeResponse(BaseModel):
     site_redirect_url: str
     payment_instructions: Optional[str]
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "merchant_code": "MX007",
                 "pay_item_id": "101007",
@@ -41,6 +41,7 @@ class PaymentInitializeResponse(BaseModel):
                 "payment_instructions": "Use test card: 5060990580000217499"
             }
         }
+    )
 
 
 class PaymentVerify(BaseModel):
@@ -74,8 +75,7 @@ class PaymentResponse(BaseModel):
     payment_method: Optional[str]
     timestamp: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PaymentWebhook(BaseModel):
@@ -99,8 +99,8 @@ class TestCardInfo(BaseModel):
     pin: str = "1234"
     instructions: str = "Use these details for testing Interswitch payment"
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "card_number": "5060990580000217499",
                 "cvv": "123",
@@ -109,3 +109,4 @@ class TestCardInfo(BaseModel):
                 "instructions": "Use these details for testing Interswitch payment"
             }
         }
+    )
@@ -1,8 +1,8 @@
 """
 Route schemas for request/response validation
 """
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationInfo, field_validator
+from typing import Optional, List, Literal
 from datetime import datetime
 from uuid import UUID
 
@@ -20,20 +20,27 @@ class RouteBase(BaseModel):
 class RouteCreate(RouteBase):
     vehicle_id: UUID
     
-    @validator('end_location')
-    def validate_locations(cls, v, values):
-        if 'start_location' in values and v == values['start_location']:
+    @field_validator('departure_time')
+    @classmethod
+    def pad_departure_time(cls, v):
+        # Normalized to zero-padded "HH:MM" for display
+        hours, minutes = v.split(":")
+        return f"{int(hours):02d}:{minutes}"
+    
+    @field_validator('end_location')
+    @classmethod
+    def validate_locations(cls, v, info: ValidationInfo):
+        if 'start_location' in info.data and v == info.data['start_location']:
             raise ValueError('Start and end locations must be different')
         return v
     
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class RouteUpdate(BaseModel):
     available_seats: Optional[int] = Field(None, ge=0, le=7)
     price_per_seat: Optional[float] = Field(None, ge=100)
-    status: Optional[str] = Field(None, pattern="^(active|departed|completed|cancelled)$")
+    status: Optional[Literal["active", "departed", "completed", "cancelled"]] = None
 
 
 class RouteSearch(BaseModel):
@@ -42,8 +49,7 @@ class RouteSearch(BaseModel):
     time_range: Optional[str] = Field(None, alias="time")
     date: Optional[datetime] = None
     
-    class Config:
-        populate_by_name = True
+    model_config = ConfigDict(populate_by_name=True)
 
 
 class RouteResponse(BaseModel):
@@ -60,8 +66,7 @@ class RouteResponse(BaseModel):
     status: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class RouteDetailResponse(RouteResponse):
@@ -69,3 +74,7 @@ class RouteDetailResponse(RouteResponse):
     driver_rating: float
     vehicle_info: str
     bookings_count: int
+
+
+# Built once: serializes lists of already-constructed responses straight to JSON
+RouteDetailListAdapter = TypeAdapter(List[RouteDetailResponse])
@@ -1,8 +1,8 @@
 """
 User schemas for request/response validation
 """
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
+from typing import Optional, Literal
 from datetime import datetime
 from uuid import UUID
 
@@ -11,18 +11,26 @@ class UserBase(BaseModel):
     name: str = Field(..., min_length=2, max_length=255)
     email: EmailStr
     phone: str = Field(..., min_length=10, max_length=20)
-    role: str = Field(..., pattern="^(DRIVER|RIDER|BOTH)$")
+    role: Literal["DRIVER", "RIDER", "BOTH"]
 
 
 class UserCreate(UserBase):
     password: str = Field(..., min_length=8, max_length=100)
     emergency_contact: Optional[str] = None
     
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password(cls, v):
-        if not any(char.isdigit() for char in v):
+        # One pass over the password, stopping once both rules are met
+        has_digit = has_upper = False
+        for char in v:
+            has_digit = has_digit or char.isdigit()
+            has_upper = has_upper or char.isupper()
+            if has_digit and has_upper:
+                break
+        if not has_digit:
             raise ValueError('Password must contain at least one digit')
-        if not any(char.isupper() for char in v):
+        if not has_upper:
             raise ValueError('Password must contain at least one uppercase letter')
         return v
 
@@ -49,8 +57,7 @@ class UserResponse(BaseModel):
     is_verified: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TokenResponse(BaseModel):
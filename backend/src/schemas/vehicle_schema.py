@@ -1,7 +1,7 @@
 """
 Vehicle schemas for request/response validation
 """
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
 from datetime import datetime
 from uuid import UUID
@@ -37,5 +37,4 @@ class VehicleResponse(BaseModel):
     is_verified: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
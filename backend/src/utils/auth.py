@@ -1,6 +1,13 @@
 """
 Authentication utilities for password hashing and JWT tokens
 """
+import base64
+import calendar
+import hashlib
+import hmac
+import orjson
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
@@ -9,22 +16,62 @@ from ..config.settings import get_settings
 
 settings = get_settings()
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# JWT configuration resolved once at import instead of per token
+JWT_SECRET_KEY = settings.JWT_SECRET_KEY
+JWT_ALGORITHM = settings.JWT_ALGORITHM
+ACCESS_TOKEN_TTL = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+def _b64url(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=")
+
+
+# HS256 tokens are signed by hand with a precomputed header and a keyed HMAC
+# that is copied per token; other algorithms go through python-jose
+_HS256_HEADER = _b64url(orjson.dumps({"alg": "HS256", "typ": "JWT"})) + b"."
+_HS256_HMAC = hmac.new(JWT_SECRET_KEY.encode(), digestmod=hashlib.sha256)
+
+# Password hasher (argon2id), created once and shared by every request
+password_hasher = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM
+)
+
+# Legacy context so bcrypt hashes created before the argon2 switch still verify
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
 
 
 def hash_password(password: str) -> str:
     """
     Hash a plain password
     """
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a plain password against a hashed password
     """
-    return pwd_context.verify(plain_password, hashed_password)
+    if not hashed_password.startswith("$argon2"):
+        return pwd_context.verify(plain_password, hashed_password)
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a stored hash uses a legacy scheme or outdated argon2 parameters
+    """
+    if not hashed_password.startswith("$argon2"):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -33,15 +80,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     """
     to_encode = data.copy()
     
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    expire = datetime.utcnow() + (expires_delta or ACCESS_TOKEN_TTL)
     
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    if JWT_ALGORITHM != "HS256":
+        return jwt.encode(to_encode, JWT_SECRET_KEY, algorithm=JWT_ALGORITHM)
+    
+    to_encode["exp"] = calendar.timegm(expire.utctimetuple())
+    signing_input = _HS256_HEADER + _b64url(orjson.dumps(to_encode))
+    mac = _HS256_HMAC.copy()
+    mac.update(signing_input)
+    encoded_jwt = signing_input + b"." + _b64url(mac.digest())
     
-    return encoded_jwt
+    return encoded_jwt.decode()
 
 
 def decode_access_token(token: str) -> Optional[dict]:
@@ -49,7 +100,7 @@ def decode_access_token(token: str) -> Optional[dict]:
     Decode and verify a JWT token
     """
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_ALGORITHM])
         return payload
     except JWTError:
         return None
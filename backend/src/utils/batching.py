@@ -0,0 +1,117 @@
+"""
+Request coalescing utilities
+
+BatchLoader collects keys requested by concurrent handlers within a short
+window and resolves them all with one batched lookup (the DataLoader pattern),
+turning N parallel single-row SELECTs into one `IN (...)` query.
+
+SingleFlight lets concurrent callers asking for the same key share a single
+in-flight call instead of each repeating it.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+
+class BatchLoader:
+    """
+    Coalesce concurrent single-key loads into one batched call
+
+    Args:
+        batch_fn: Coroutine taking a list of keys and returning {key: value};
+            keys missing from the result resolve to None
+        window_seconds: How long to wait for more keys before dispatching
+        max_batch_size: Dispatch immediately once this many keys are pending
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        window_seconds: float = 0.005,
+        max_batch_size: int = 100
+    ):
+        self.batch_fn = batch_fn
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[Hashable, List[asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # The loop only keeps weak references to tasks, so hold running dispatches
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: Hashable) -> Any:
+        """
+        Load one key, sharing the lookup with any other keys requested meanwhile
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._schedule_dispatch(loop, delay=0)
+        elif self._timer is None:
+            self._schedule_dispatch(loop, delay=self.window_seconds)
+
+        return await future
+
+    def _schedule_dispatch(self, loop: asyncio.AbstractEventLoop, delay: float) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = loop.call_later(delay, self._start_dispatch, loop)
+
+    def _start_dispatch(self, loop: asyncio.AbstractEventLoop) -> None:
+        task = loop.create_task(self._dispatch())
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def _dispatch(self) -> None:
+        pending, self._pending = self._pending, {}
+        self._timer = None
+        if not pending:
+            return
+
+        try:
+            results = await self.batch_fn(list(pending))
+        except Exception as exc:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exc)
+            return
+        except BaseException:
+            # Cancelled (e.g. loop shutdown) - don't leave callers awaiting forever
+            for futures in pending.values():
+                for future in futures:
+                    future.cancel()
+            raise
+
+        for key, futures in pending.items():
+            value = results.get(key)
+            for future in futures:
+                if not future.done():
+                    future.set_result(value)
+
+
+class SingleFlight:
+    """
+    Run at most one call per key at a time; concurrent callers share its result
+
+    The shared call runs as its own task, so one caller being cancelled (e.g. a
+    dropped connection) doesn't abort the work the other callers are awaiting
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn() for this key, joining the call already running if there is one
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
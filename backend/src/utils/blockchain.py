@@ -12,7 +12,6 @@ In production, this would integrate with Polygon Mumbai Testnet or mainnet using
 
 For the hackathon demo, we use:
 - Cryptographic hashing (SHA256) for token generation
-- Mock transaction simulation with delays
 - Database storage for verification
 - QR code compatible token format
 
@@ -23,15 +22,16 @@ Security Features:
 4. Cryptographic integrity (tampering detection)
 """
 import hashlib
-import json
 import secrets
-import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, Optional, Tuple
 from uuid import UUID
 
+import orjson
+
 
 def generate_booking_token(
+    *,
     booking_id: UUID,
     route_id: UUID,
     rider_id: UUID,
@@ -52,7 +52,10 @@ def generate_booking_token(
         route_id: Route being booked
         rider_id: Rider making the booking
         amount: Booking amount in Naira
-        timestamp: Token creation time (defaults to now)
+        timestamp: Token creation time (defaults to now). Pass the booking's
+            created_at so every caller derives the same token ID.
+    
+    All arguments are keyword-only so call sites can't drift out of order.
     
     Returns:
         Dictionary containing:
@@ -82,19 +85,14 @@ def generate_booking_token(
     if timestamp is None:
         timestamp = datetime.utcnow()
     
-    # Create booking data for hashing
-    booking_data = {
-        "booking_id": str(booking_id),
-        "route_id": str(route_id),
-        "rider_id": str(rider_id),
-        "amount": amount,
-        "timestamp": timestamp.isoformat(),
-        "network": "openride-demo-blockchain",
-        "version": "1.0"
-    }
-    
-    # Generate cryptographic hash of booking details
-    booking_string = json.dumps(booking_data, sort_keys=True)
+    # Serialize booking details for hashing. Byte-for-byte what
+    # json.dumps(booking_data, sort_keys=True) produced (keys pre-sorted; UUIDs
+    # and ISO timestamps need no escaping), so existing token IDs still match
+    booking_string = (
+        f'{{"amount": {amount!r}, "booking_id": "{booking_id}", '
+        f'"network": "openride-demo-blockchain", "rider_id": "{rider_id}", '
+        f'"route_id": "{route_id}", "timestamp": "{timestamp.isoformat()}", "version": "1.0"}}'
+    )
     booking_hash = hashlib.sha256(booking_string.encode()).hexdigest()
     
     # Create unique token ID
@@ -104,25 +102,25 @@ def generate_booking_token(
     # In production, this would be the actual transaction hash from Polygon
     transaction_hash = f"0x{secrets.token_hex(32)}"
     
-    # Calculate expiration (24 hours from creation)
-    expires_at = timestamp + timedelta(hours=24)
+    # Unix creation time, converted once; tokens expire 24 hours later
+    created_at = int(timestamp.timestamp())
+    expires_at = created_at + 86400
     
-    # Create QR code data (JSON string)
-    qr_data = json.dumps({
-        "tokenId": token_id,
-        "bookingId": str(booking_id),
-        "timestamp": int(timestamp.timestamp()),
-        "hash": booking_hash[:16]  # First 16 chars for verification
-    })
+    # Create QR code data (JSON string, same layout json.dumps gave). Hash is
+    # the first 16 chars, for verification
+    qr_data = (
+        f'{{"tokenId": "{token_id}", "bookingId": "{booking_id}", '
+        f'"timestamp": {created_at}, "hash": "{booking_hash[:16]}"}}'
+    )
     
     return {
         "tokenId": token_id,
         "bookingHash": booking_hash,
         "transactionHash": transaction_hash,
-        "timestamp": int(timestamp.timestamp()),
+        "timestamp": created_at,
         "blockchainNetwork": "Demo Blockchain",  # Change to "Polygon Mumbai Testnet" for production
         "verified": True,
-        "expiresAt": int(expires_at.timestamp()),
+        "expiresAt": expires_at,
         "qrData": qr_data
     }
 
@@ -164,23 +162,20 @@ def verify_booking_token(
         else:
             # Token invalid, show error message
     """
-    if current_time is None:
-        current_time = datetime.utcnow()
-    
     # Check token format
     if not token_id or not token_id.startswith("SEAT-"):
         return False, "Invalid token format"
     
-    # Parse token parts
-    parts = token_id.split("-")
-    if len(parts) != 3:
+    # Parse token parts: fixed layout SEAT-{8 hex}-{8 hex}
+    if len(token_id) != 22 or token_id[13] != "-":
         return False, "Malformed token ID"
     
-    token_booking_id = parts[1]
-    token_hash = parts[2]
+    token_booking_id = token_id[5:13]
+    token_hash = token_id[14:]
     
-    # Verify booking ID matches
-    if token_booking_id != str(booking_id)[:8]:
+    # Verify booking ID matches (first 8 hex digits, formatted from the
+    # UUID's top 32 bits rather than stringifying the whole UUID)
+    if token_booking_id != f"{booking_id.int >> 96:08x}":
         return False, "Token does not match this booking"
     
     # Verify hash matches
@@ -221,33 +216,6 @@ def validate_token_timestamp(token_timestamp: int, current_time: Optional[dateti
     return True, "Token is valid"
 
 
-def simulate_blockchain_confirmation(delay_seconds: float = 2.0) -> Dict:
-    """
-    Simulate blockchain transaction confirmation delay
-    
-    This mimics the actual blockchain confirmation process.
-    In production with Polygon:
-    - Transaction submission takes 1-3 seconds
-    - Block confirmation takes 2-5 seconds
-    - Total time: 3-8 seconds typically
-    
-    Args:
-        delay_seconds: Simulated confirmation delay (default 2 seconds)
-    
-    Returns:
-        Dictionary with confirmation details
-    """
-    time.sleep(delay_seconds)
-    
-    return {
-        "confirmed": True,
-        "confirmationTime": delay_seconds,
-        "blockNumber": secrets.randbelow(1000000) + 1000000,  # Mock block number
-        "gasUsed": "21000",  # Standard transfer gas
-        "status": "success"
-    }
-
-
 def generate_qr_code_data(token_id: str, booking_id: UUID, timestamp: int) -> str:
     """
     Generate QR code data string for scanning
@@ -266,15 +234,15 @@ def generate_qr_code_data(token_id: str, booking_id: UUID, timestamp: int) -> st
     Returns:
         JSON string suitable for QR code encoding
     """
-    qr_data = {
-        "tokenId": token_id,
-        "bookingId": str(booking_id),
-        "timestamp": timestamp,
-        "platform": "openride",
-        "version": "1.0"
-    }
-    
-    return json.dumps(qr_data, separators=(',', ':'))  # Compact JSON
+    # Compact JSON built directly: the token ID is generated SEAT-{hex}-{hex}
+    # and booking IDs are UUIDs, so nothing needs escaping
+    return (
+        f'{{"tokenId":"{token_id}","bookingId":"{booking_id}",'
+        f'"timestamp":{timestamp},"platform":"openride","version":"1.0"}}'
+    )
+
+
+_QR_REQUIRED_FIELDS = frozenset(("tokenId", "bookingId", "timestamp"))
 
 
 def parse_qr_code_data(qr_string: str) -> Optional[Dict]:
@@ -288,16 +256,15 @@ def parse_qr_code_data(qr_string: str) -> Optional[Dict]:
         Parsed dictionary or None if invalid
     """
     try:
-        data = json.loads(qr_string)
-        
-        # Validate required fields
-        required_fields = ["tokenId", "bookingId", "timestamp"]
-        if not all(field in data for field in required_fields):
-            return None
-        
-        return data
-    except (json.JSONDecodeError, ValueError):
+        data = orjson.loads(qr_string)
+    except orjson.JSONDecodeError:
         return None
+    
+    # Validate required fields
+    if not isinstance(data, dict) or not _QR_REQUIRED_FIELDS <= data.keys():
+        return None
+    
+    return data
 
 
 def get_explorer_url(transaction_hash: str, network: str = "demo") -> str:
@@ -0,0 +1,35 @@
+"""
+HTTP caching helpers for read-mostly detail endpoints
+
+Responses carry a weak ETag derived from the serialized body, so a client
+polling an unchanged resource gets an empty 304 instead of the full payload.
+The tag covers everything in the body (seat counts, ratings, vehicle details),
+which a row timestamp alone would not.
+"""
+import hashlib
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+
+def etag_for(body: bytes) -> str:
+    """
+    Weak ETag for a serialized response body
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def conditional_json_response(request: Request, model: BaseModel, cache_control: str) -> Response:
+    """
+    Serialize a response model, answering 304 Not Modified when the client's
+    If-None-Match already names this version
+    """
+    body = model.model_dump_json().encode()
+    etag = etag_for(body)
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+
+    client_tags = {tag.strip() for tag in request.headers.get("if-none-match", "").split(",")}
+    if etag in client_tags or "*" in client_tags:
+        return Response(status_code=304, headers=headers)
+
+    return Response(body, media_type="application/json", headers=headers)
@@ -4,16 +4,23 @@ Redirects users to Interswitch payment page, then back to your site after paymen
 """
 import httpx
 import hashlib
+import hmac
 import json
 import secrets
+import time
 from typing import Dict, Optional
 from datetime import datetime
+from urllib.parse import urlencode
 
 # INTERSWITCH SANDBOX CREDENTIALS
 MERCHANT_CODE = "MX26070"
 PAY_ITEM_ID = "Default_Payable_MX26070"
 MAC_KEY = "D3D1D05AFE42AD50818167EAC73C109168A0F108F32645C8B59E897FA930DA44F9230910DAC9E20641823799A107A02068F7BC0F4CC41D2952E249552255710F"
 
+# Payment hashes always start with the merchant code; hash that prefix once and copy it per call
+_PAYMENT_HASH_PREFIX = hashlib.sha512(MERCHANT_CODE.encode('utf-8'))
+_MAC_KEY_BYTES = MAC_KEY.encode('utf-8')
+
 # Interswitch URLs
 WEBPAY_URL = "https://qa.interswitchng.com/collections/w/pay"  # Sandbox redirect URL
 VERIFY_URL = "https://qa.interswitchng.com/collections/api/v1/gettransaction.json"
@@ -22,12 +29,43 @@ VERIFY_URL = "https://qa.interswitchng.com/collections/api/v1/gettransaction.jso
 FRONTEND_BASE_URL = "https://openride.vercel.app" # Your React app URL
 SITE_REDIRECT_URL = f"{FRONTEND_BASE_URL}/payment/callback"  # Where Interswitch redirects after payment
 
+# The MAC ends with the redirect URL and MAC key; encode that constant tail once
+_MAC_HASH_TAIL = f"{SITE_REDIRECT_URL}{MAC_KEY}".encode('utf-8')
+
+# One pooled client per worker, so verification calls reuse kept-alive TLS
+# connections to Interswitch instead of handshaking on every request
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Return the shared Interswitch HTTP client, creating it on first use
+    """
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            # Fail fast on an unreachable host; established calls keep the full 30s
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_keepalive_connections=64, max_connections=128)
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """
+    Close the shared HTTP client (called on application shutdown)
+    """
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 
 def generate_transaction_ref(booking_id: str) -> str:
     """
     Generate unique transaction reference in format: OPENRIDE-{timestamp}-{randomId}
     """
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    timestamp = time.strftime("%Y%m%d%H%M%S", time.gmtime())
     random_id = secrets.token_hex(4).upper()
     
     return f"OPENRIDE-{timestamp}-{random_id}"
@@ -37,15 +75,18 @@ def convert_to_kobo(amount: float) -> int:
     """
     Convert amount from Naira to Kobo (multiply by 100)
     Interswitch expects amount in kobo (smallest currency unit)
+    
+    Rounds rather than truncates: 1500.01 * 100 is 150000.99999999997 as a
+    float, which int() would cut to 150000
     """
-    return int(amount * 100)
+    return round(amount * 100)
 
 
 def convert_from_kobo(amount_kobo: int) -> float:
     """
     Convert amount from Kobo to Naira (divide by 100)
     """
-    return float(amount_kobo / 100)
+    return amount_kobo / 100
 
 
 def generate_mac_hash(txn_ref: str, amount_kobo: int) -> str:
@@ -54,13 +95,11 @@ def generate_mac_hash(txn_ref: str, amount_kobo: int) -> str:
     
     Formula: SHA512(txn_ref + PAY_ITEM_ID + amount + redirect_url + MAC_KEY)
     """
-    # Concatenate parameters in specific order
-    mac_string = f"{txn_ref}{PAY_ITEM_ID}{amount_kobo}{SITE_REDIRECT_URL}{MAC_KEY}"
+    # Hash parameters in specific order; the constant tail is pre-encoded
+    mac_hash = hashlib.sha512(f"{txn_ref}{PAY_ITEM_ID}{amount_kobo}".encode('utf-8'))
+    mac_hash.update(_MAC_HASH_TAIL)
     
-    # Generate SHA512 hash
-    mac_hash = hashlib.sha512(mac_string.encode('utf-8')).hexdigest()
-    
-    return mac_hash
+    return mac_hash.hexdigest()
 
 
 async def initiate_payment(
@@ -106,8 +145,9 @@ async def initiate_payment(
         "mode": "TEST"  # TEST for sandbox, remove for production
     }
     
-    # Build redirect URL with query parameters
-    query_params = "&".join([f"{key}={value}" for key, value in payment_params.items()])
+    # Build redirect URL with query parameters (percent-encoded, so names,
+    # emails and the callback URL survive intact)
+    query_params = urlencode(payment_params)
     redirect_url = f"{WEBPAY_URL}?{query_params}"
     
     response = {
@@ -158,46 +198,45 @@ async def verify_payment(
         params["amount"] = amount_in_kobo
     
     # Generate hash for verification request
-    hash_string = f"{transaction_ref}{MAC_KEY}"
-    request_hash = hashlib.sha512(hash_string.encode('utf-8')).hexdigest()
+    request_hash = hashlib.sha512(transaction_ref.encode('utf-8'))
+    request_hash.update(_MAC_KEY_BYTES)
     
     headers = {
         "Content-Type": "application/json",
-        "Hash": request_hash
+        "Hash": request_hash.hexdigest()
     }
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(VERIFY_URL, params=params, headers=headers)
-            response_data = response.json()
-            
-            # Check response code
-            # "00" or "10" means successful payment
-            response_code = response_data.get("ResponseCode", "")
-            
-            if response_code in ["00", "10"]:
-                status = "successful"
-            else:
-                status = "failed"
-            
-            verification_response = {
-                "status": status,
-                "transaction_ref": transaction_ref,
-                "interswitch_ref": response_data.get("PaymentReference", f"ISW-{transaction_ref[-12:]}"),
-                "amount": convert_from_kobo(response_data.get("Amount", amount_in_kobo or 0)),
-                "amount_kobo": response_data.get("Amount", amount_in_kobo),
-                "payment_method": response_data.get("PaymentMethod", "CARD").lower(),
-                "timestamp": response_data.get("TransactionDate", datetime.utcnow().isoformat()),
-                "verified": True,
-                "response_code": response_code,
-                "response_description": response_data.get("ResponseDescription", ""),
-                "card_number": response_data.get("CardNumber", ""),
-                "retrieval_ref": response_data.get("RetrievalReferenceNumber", ""),
-                "raw_response": response_data
-            }
-            
-            return verification_response
-            
+        response = await get_http_client().get(VERIFY_URL, params=params, headers=headers)
+        response_data = response.json()
+        
+        # Check response code
+        # "00" or "10" means successful payment
+        response_code = response_data.get("ResponseCode", "")
+        
+        if response_code in ["00", "10"]:
+            status = "successful"
+        else:
+            status = "failed"
+        
+        verification_response = {
+            "status": status,
+            "transaction_ref": transaction_ref,
+            "interswitch_ref": response_data.get("PaymentReference", f"ISW-{transaction_ref[-12:]}"),
+            "amount": convert_from_kobo(response_data.get("Amount", amount_in_kobo or 0)),
+            "amount_kobo": response_data.get("Amount", amount_in_kobo),
+            "payment_method": response_data.get("PaymentMethod", "CARD").lower(),
+            "timestamp": response_data.get("TransactionDate", datetime.utcnow().isoformat()),
+            "verified": True,
+            "response_code": response_code,
+            "response_description": response_data.get("ResponseDescription", ""),
+            "card_number": response_data.get("CardNumber", ""),
+            "retrieval_ref": response_data.get("RetrievalReferenceNumber", ""),
+            "raw_response": response_data
+        }
+        
+        return verification_response
+        
     except httpx.RequestError as e:
         return {
             "status": "failed",
@@ -221,62 +260,74 @@ def calculate_payment_hash(amount: float, transaction_ref: str) -> str:
     Calculate payment hash for verification
     Used to verify webhook authenticity
     """
-    amount_in_kobo = convert_to_kobo(amount)
-    hash_string = f"{MERCHANT_CODE}{transaction_ref}{amount_in_kobo}{MAC_KEY}"
-    payment_hash = hashlib.sha512(hash_string.encode('utf-8')).hexdigest()
+    return _payment_hash_kobo(convert_to_kobo(amount), transaction_ref)
+
+
+def _payment_hash_kobo(amount_kobo: int, transaction_ref: str) -> str:
+    payment_hash = _PAYMENT_HASH_PREFIX.copy()
+    payment_hash.update(f"{transaction_ref}{amount_kobo}".encode('utf-8'))
+    payment_hash.update(_MAC_KEY_BYTES)
     
-    return payment_hash
+    return payment_hash.hexdigest()
 
 
-def verify_webhook_signature(webhook_data: Dict, signature: str) -> bool:
+def verify_webhook_signature(webhook_data: Dict, signature: Optional[str]) -> bool:
     """
     Verify Interswitch webhook signature
-    Ensures webhook is from legitimate source
+    Ensures webhook is from legitimate source (constant-time comparison)
     """
+    if not signature:
+        return False
+    
     amount = webhook_data.get("amount", 0)
     txn_ref = webhook_data.get("transaction_ref", "")
-    expected_hash = calculate_payment_hash(convert_from_kobo(amount), txn_ref)
+    # Webhook amounts are already kobo; hash them as-is, no round trip via Naira
+    expected_hash = _payment_hash_kobo(int(amount), txn_ref)
     
-    return expected_hash == signature
+    return hmac.compare_digest(expected_hash, signature)
 
 
-def get_test_cards() -> Dict:
-    """
-    Get Interswitch sandbox test card details
-    """
-    return {
-        "successful_cards": [
-            {
-                "type": "Mastercard",
-                "card_number": "5060990580000217499",
-                "cvv": "111",
-                "expiry": "03/50",
-                "pin": "1111",
-                "description": "Successful transaction"
-            },
-            {
-                "type": "Verve",
-                "card_number": "5060990580000217480",
-                "cvv": "111",
-                "expiry": "03/50",
-                "pin": "1111",
-                "description": "Successful transaction"
-            },
-            {
-                "type": "Visa",
-                "card_number": "4012001037141112",
-                "cvv": "111",
-                "expiry": "03/50",
-                "pin": "1111",
-                "description": "Successful transaction"
-            }
-        ],
-        "failed_card": {
-            "type": "Test Failed",
-            "card_number": "5060990580000217481",
+# Sandbox test cards are static - build them once
+TEST_CARDS = {
+    "successful_cards": [
+        {
+            "type": "Mastercard",
+            "card_number": "5060990580000217499",
+            "cvv": "111",
+            "expiry": "03/50",
+            "pin": "1111",
+            "description": "Successful transaction"
+        },
+        {
+            "type": "Verve",
+            "card_number": "5060990580000217480",
+            "cvv": "111",
+            "expiry": "03/50",
+            "pin": "1111",
+            "description": "Successful transaction"
+        },
+        {
+            "type": "Visa",
+            "card_number": "4012001037141112",
             "cvv": "111",
             "expiry": "03/50",
             "pin": "1111",
-            "description": "Failed transaction test"
+            "description": "Successful transaction"
         }
-    }
\ No newline at end of file
+    ],
+    "failed_card": {
+        "type": "Test Failed",
+        "card_number": "5060990580000217481",
+        "cvv": "111",
+        "expiry": "03/50",
+        "pin": "1111",
+        "description": "Failed transaction test"
+    }
+}
+
+
+def get_test_cards() -> Dict:
+    """
+    Get Interswitch sandbox test card details
+    """
+    return TEST_CARDS
@@ -3,7 +3,8 @@ Location and distance calculation utilities for route matching
 
 Provides geographic calculations and location grouping data for Nigerian areas
 """
-from typing import Tuple, List, Dict
+from functools import lru_cache
+from typing import Tuple, List, Dict, FrozenSet, Optional
 import math
 
 
@@ -68,7 +69,23 @@ ADJACENT_AREAS = {
     "Ikorodu": [],
 }
 
+# Membership lookups below run for every candidate route, so keep the area data
+# as frozensets (O(1) `in`) and index which groups each location belongs to
+EMPTY_AREAS: FrozenSet[str] = frozenset()
+ADJACENT_AREAS: Dict[str, FrozenSet[str]] = {
+    area: frozenset(nearby) for area, nearby in ADJACENT_AREAS.items()
+}
+MAINLAND_AREAS = frozenset(LOCATION_GROUPS["mainland"])
+ISLAND_AREAS = frozenset(LOCATION_GROUPS["island"])
+
+_GROUP_ORDER = {group_name: index for index, group_name in enumerate(LOCATION_GROUPS)}
+LOCATION_TO_GROUPS: Dict[str, FrozenSet[str]] = {}
+for _group_name, _locations in LOCATION_GROUPS.items():
+    for _location in _locations:
+        LOCATION_TO_GROUPS[_location] = LOCATION_TO_GROUPS.get(_location, EMPTY_AREAS) | {_group_name}
 
+
+@lru_cache(maxsize=4096)
 def calculate_distance(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
     """
     Calculate distance between two coordinates using Haversine formula
@@ -101,6 +118,23 @@ def calculate_distance(coord1: Tuple[float, float], coord2: Tuple[float, float])
     return distance
 
 
+# Every distance the matcher needs is between two named areas, so compute the
+# whole table once at import; lookups then do no trigonometry at all
+LOCATION_DISTANCES: Dict[Tuple[str, str], float] = {
+    (name1, name2): calculate_distance(coord1, coord2)
+    for name1, coord1 in LOCATION_COORDINATES.items()
+    for name2, coord2 in LOCATION_COORDINATES.items()
+}
+
+
+def distance_between(location1: str, location2: str) -> Optional[float]:
+    """
+    Distance in kilometers between two named areas, or None if either
+    has no known coordinates
+    """
+    return LOCATION_DISTANCES.get((location1, location2))
+
+
 def calculate_location_similarity(
     search_location: str,
     route_location: str,
@@ -124,6 +158,18 @@ def calculate_location_similarity(
     Returns:
         Tuple of (score, reasons)
     """
+    score, reasons = _location_similarity(search_location, route_location, tuple(route_bus_stops))
+    return score, list(reasons)
+
+
+# Searches draw on a small vocabulary of areas, so the same (search, route,
+# stops) combinations recur across candidate routes and repeated searches
+@lru_cache(maxsize=4096)
+def _location_similarity(
+    search_location: str,
+    route_location: str,
+    route_bus_stops: Tuple[str, ...]
+) -> Tuple[float, Tuple[str, ...]]:
     reasons = []
     score = 0.0
     
@@ -131,58 +177,66 @@ def calculate_location_similarity(
     if search_location == route_location:
         score = 100
         reasons.append(f"Exact location match: {search_location}")
-        return score, reasons
+        return score, tuple(reasons)
     
     # Check if search location is in bus stops
     if search_location in route_bus_stops:
         score = 100
         reasons.append(f"Direct stop at {search_location}")
-        return score, reasons
+        return score, tuple(reasons)
     
     # Check adjacent areas
-    if route_location in ADJACENT_AREAS.get(search_location, []):
+    search_adjacent = ADJACENT_AREAS.get(search_location, EMPTY_AREAS)
+    area_adjacent = False
+    if route_location in search_adjacent:
         score = 60
         reasons.append(f"Adjacent area: {route_location} is near {search_location}")
-    elif search_location in ADJACENT_AREAS.get(route_location, []):
+        area_adjacent = True
+    elif search_location in ADJACENT_AREAS.get(route_location, EMPTY_AREAS):
         score = 60
         reasons.append(f"Adjacent area: {search_location} is near {route_location}")
+        area_adjacent = True
     
     # Check if any bus stop is adjacent
     for stop in route_bus_stops:
-        if stop in ADJACENT_AREAS.get(search_location, []):
+        if stop in search_adjacent:
             score = max(score, 60)
-            if f"Adjacent area" not in " ".join(reasons):
+            if not area_adjacent:
                 reasons.append(f"Route passes near {search_location} via {stop}")
             break
     
-    # Check same district/group
-    if score < 60:
-        for group_name, locations in LOCATION_GROUPS.items():
-            if search_location in locations and route_location in locations:
-                score = max(score, 80)
-                reasons.append(f"Same area: Both in {group_name.replace('_', ' ')}")
-                break
+    # The group, region and distance tiers only apply below 60, so an
+    # adjacency match is final
+    if score >= 60:
+        return score, tuple(reasons)
+    
+    # Check same district/group (first shared group in LOCATION_GROUPS order)
+    shared_groups = (
+        LOCATION_TO_GROUPS.get(search_location, EMPTY_AREAS)
+        & LOCATION_TO_GROUPS.get(route_location, EMPTY_AREAS)
+    )
+    if shared_groups:
+        group_name = min(shared_groups, key=_GROUP_ORDER.__getitem__)
+        score = 80
+        reasons.append(f"Same area: Both in {group_name.replace('_', ' ')}")
+        # Nothing later scores above 40
+        return score, tuple(reasons)
     
     # Check same mainland/island
-    if score < 60:
-        search_in_mainland = search_location in LOCATION_GROUPS["mainland"]
-        route_in_mainland = route_location in LOCATION_GROUPS["mainland"]
-        search_in_island = search_location in LOCATION_GROUPS["island"]
-        route_in_island = route_location in LOCATION_GROUPS["island"]
-        
-        if (search_in_mainland and route_in_mainland) or (search_in_island and route_in_island):
-            score = max(score, 40)
-            region = "mainland" if search_in_mainland else "island"
-            reasons.append(f"Same region: Both on {region}")
+    search_in_mainland = search_location in MAINLAND_AREAS
+    route_in_mainland = route_location in MAINLAND_AREAS
+    search_in_island = search_location in ISLAND_AREAS
+    route_in_island = route_location in ISLAND_AREAS
+    
+    if (search_in_mainland and route_in_mainland) or (search_in_island and route_in_island):
+        score = 40
+        region = "mainland" if search_in_mainland else "island"
+        reasons.append(f"Same region: Both on {region}")
     
     # Calculate geographic proximity if locations have coordinates
-    if search_location in LOCATION_COORDINATES and route_location in LOCATION_COORDINATES:
-        distance = calculate_distance(
-            LOCATION_COORDINATES[search_location],
-            LOCATION_COORDINATES[route_location]
-        )
-        
-        if distance < 5 and score < 60:
+    distance = distance_between(search_location, route_location)
+    if distance is not None:
+        if distance < 5:
             score = max(score, 40)
             reasons.append(f"Close proximity: {distance:.1f}km away")
         elif distance < 10 and score < 40:
@@ -194,4 +248,4 @@ def calculate_location_similarity(
         score = 10
         reasons.append("Same city area")
     
-    return score, reasons
+    return score, tuple(reasons)
@@ -13,19 +13,31 @@ Future ML Enhancements:
 - Track user behavior patterns to improve recommendations
 - Use historical data to predict optimal routes
 """
+import heapq
+from functools import lru_cache
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime, timedelta
 
 # Import location utilities
 from .location_utils import (
-    LOCATION_COORDINATES,
     LOCATION_GROUPS,
     ADJACENT_AREAS,
-    calculate_distance,
+    EMPTY_AREAS,
+    distance_between,
     calculate_location_similarity
 )
 
 
+@lru_cache(maxsize=1440)  # one slot per minute of the day
+def time_to_minutes(time_str: str) -> int:
+    """Convert HH:MM to minutes since midnight"""
+    try:
+        hours, minutes = map(int, time_str.split(":"))
+        return hours * 60 + minutes
+    except:
+        return 0
+
+
 def calculate_time_compatibility(
     search_time: str,
     route_departure_time: str,
@@ -51,14 +63,6 @@ def calculate_time_compatibility(
     reasons = []
     
     # Parse times
-    def time_to_minutes(time_str: str) -> int:
-        """Convert HH:MM to minutes since midnight"""
-        try:
-            hours, minutes = map(int, time_str.split(":"))
-            return hours * 60 + minutes
-        except:
-            return 0
-    
     route_minutes = time_to_minutes(route_departure_time)
     
     # If time_range provided, use the start of range, otherwise use search_time
@@ -123,43 +127,55 @@ def calculate_route_efficiency(
     Returns:
         Tuple of (score, reasons)
     """
+    score, reasons = _route_efficiency(
+        search_from, search_to, route_from, route_to, tuple(route_bus_stops)
+    )
+    return score, list(reasons)
+
+
+# The search endpoints are fixed for a ranking pass and routes share a few
+# start/end/stop combinations, so the same inputs recur across candidates
+@lru_cache(maxsize=4096)
+def _route_efficiency(
+    search_from: str,
+    search_to: str,
+    route_from: str,
+    route_to: str,
+    route_bus_stops: Tuple[str, ...]
+) -> Tuple[float, Tuple[str, ...]]:
     reasons = []
     score = 0.0
     
-    # Check if both locations match route exactly
-    if (search_from == route_from or search_from in route_bus_stops) and \
-       (search_to == route_to or search_to in route_bus_stops):
-        score = 100
-        reasons.append("Perfect route: Pickup and dropoff on direct path")
-        return score, reasons
-    
     # Check if pickup location is on route
     pickup_on_route = (search_from == route_from or search_from in route_bus_stops)
     # Check if dropoff location is on route
     dropoff_on_route = (search_to == route_to or search_to in route_bus_stops)
     
+    # Check if both locations match route exactly
     if pickup_on_route and dropoff_on_route:
         score = 100
-        reasons.append("Optimal route: Both stops on direct path")
-    elif pickup_on_route:
+        reasons.append("Perfect route: Pickup and dropoff on direct path")
+        return score, tuple(reasons)
+    
+    if pickup_on_route:
         score = 80
         reasons.append("Good route: Pickup on path")
         # Check dropoff proximity
-        if search_to in ADJACENT_AREAS.get(route_to, []):
+        if search_to in ADJACENT_AREAS.get(route_to, EMPTY_AREAS):
             reasons.append(f"Dropoff close to destination")
     elif dropoff_on_route:
         score = 80
         reasons.append("Good route: Dropoff on path")
         # Check pickup proximity
-        if search_from in ADJACENT_AREAS.get(route_from, []):
+        if search_from in ADJACENT_AREAS.get(route_from, EMPTY_AREAS):
             reasons.append(f"Pickup close to route start")
     else:
         # Calculate if it's a reasonable detour
         # Check if locations are in adjacent areas
-        pickup_adjacent = (search_from in ADJACENT_AREAS.get(route_from, []) or 
-                          route_from in ADJACENT_AREAS.get(search_from, []))
-        dropoff_adjacent = (search_to in ADJACENT_AREAS.get(route_to, []) or 
-                           route_to in ADJACENT_AREAS.get(search_to, []))
+        pickup_adjacent = (search_from in ADJACENT_AREAS.get(route_from, EMPTY_AREAS) or 
+                          route_from in ADJACENT_AREAS.get(search_from, EMPTY_AREAS))
+        dropoff_adjacent = (search_to in ADJACENT_AREAS.get(route_to, EMPTY_AREAS) or 
+                           route_to in ADJACENT_AREAS.get(search_to, EMPTY_AREAS))
         
         if pickup_adjacent and dropoff_adjacent:
             score = 60
@@ -169,15 +185,9 @@ def calculate_route_efficiency(
             reasons.append("Moderate detour required")
         else:
             # Check distance if coordinates available
-            if all(loc in LOCATION_COORDINATES for loc in [search_from, route_from, search_to, route_to]):
-                pickup_distance = calculate_distance(
-                    LOCATION_COORDINATES[search_from],
-                    LOCATION_COORDINATES[route_from]
-                )
-                dropoff_distance = calculate_distance(
-                    LOCATION_COORDINATES[search_to],
-                    LOCATION_COORDINATES[route_to]
-                )
+            pickup_distance = distance_between(search_from, route_from)
+            dropoff_distance = distance_between(search_to, route_to)
+            if pickup_distance is not None and dropoff_distance is not None:
                 total_detour = pickup_distance + dropoff_distance
                 
                 if total_detour < 5:
@@ -193,7 +203,12 @@ def calculate_route_efficiency(
                 score = 30
                 reasons.append("Route requires some detour")
     
-    return score, reasons
+    return score, tuple(reasons)
+
+
+def _is_truthy(value) -> bool:
+    """Verification flag as stored (bool) or as serialized ("true" / 1)"""
+    return value is True or value == 1 or value == "true"
 
 
 def calculate_availability_bonus(
@@ -280,23 +295,45 @@ def calculate_route_match(
     - Time preferences by user demographics
     - Popular route combinations
     """
-    all_reasons = []
+    return _match_details(_score_route(search_from, search_to, search_time, time_range, route))
+
+
+# Prefixes for each component's reasons, in the order _score_route returns them
+_REASON_PREFIXES = ("📍 Pickup: ", "🎯 Dropoff: ", "🕐 ", "🛣️ ", "✨ ")
+
+
+def _score_route(
+    search_from: str,
+    search_to: str,
+    search_time: str,
+    time_range: Optional[str],
+    route: Dict
+) -> Tuple[float, Tuple[float, ...], Tuple[List[str], ...]]:
+    """
+    Score one route, returning (final_score, component scores, raw reasons)
+    
+    The decorated reason list is only built by _match_details, so ranking
+    can skip it for routes that fall outside the returned top matches
+    """
+    # Read each route field once; the scorers below share them
+    start_location = route.get("start_location", "")
+    end_location = route.get("end_location", "")
+    bus_stops = tuple(route.get("bus_stops") or ())
+    is_verified = route.get("is_verified", False)
     
     # 1. Calculate location similarity for pickup (20% weight)
     from_score, from_reasons = calculate_location_similarity(
         search_from,
-        route.get("start_location", ""),
-        route.get("bus_stops", [])
+        start_location,
+        bus_stops
     )
-    all_reasons.extend([f"📍 Pickup: {r}" for r in from_reasons])
     
     # 2. Calculate location similarity for dropoff (20% weight)
     to_score, to_reasons = calculate_location_similarity(
         search_to,
-        route.get("end_location", ""),
-        route.get("bus_stops", [])
+        end_location,
+        bus_stops
     )
-    all_reasons.extend([f"🎯 Dropoff: {r}" for r in to_reasons])
     
     # 3. Calculate time compatibility (30% weight)
     time_score, time_reasons = calculate_time_compatibility(
@@ -304,25 +341,22 @@ def calculate_route_match(
         route.get("departure_time", ""),
         time_range
     )
-    all_reasons.extend([f"🕐 {r}" for r in time_reasons])
     
     # 4. Calculate route efficiency (20% weight)
     efficiency_score, efficiency_reasons = calculate_route_efficiency(
         search_from,
         search_to,
-        route.get("start_location", ""),
-        route.get("end_location", ""),
-        route.get("bus_stops", [])
+        start_location,
+        end_location,
+        bus_stops
     )
-    all_reasons.extend([f"🛣️ {r}" for r in efficiency_reasons])
     
     # 5. Calculate availability bonus (10% weight)
     bonus_score, bonus_reasons = calculate_availability_bonus(
         route.get("available_seats", 0),
         route.get("driver_rating", 0.0),
-        route.get("is_verified", False) or route.get("is_verified", "") == "true"
+        _is_truthy(is_verified)
     )
-    all_reasons.extend([f"✨ {r}" for r in bonus_reasons])
     
     # Calculate weighted total score
     weighted_score = (
@@ -336,6 +370,26 @@ def calculate_route_match(
     # Ensure score is within 0-100
     final_score = min(max(weighted_score, 0), 100)
     
+    return (
+        final_score,
+        (from_score, to_score, time_score, efficiency_score, bonus_score),
+        (from_reasons, to_reasons, time_reasons, efficiency_reasons, bonus_reasons)
+    )
+
+
+def _match_details(scored: Tuple[float, Tuple[float, ...], Tuple[List[str], ...]]) -> Dict:
+    """
+    Build the match dict (rounded breakdown, decorated reasons, confidence)
+    """
+    final_score, component_scores, reason_groups = scored
+    from_score, to_score, time_score, efficiency_score, bonus_score = component_scores
+    
+    all_reasons = [
+        f"{prefix}{reason}"
+        for prefix, reasons in zip(_REASON_PREFIXES, reason_groups)
+        for reason in reasons
+    ]
+    
     # Determine confidence level
     if final_score >= 80:
         confidence = "high"
@@ -363,7 +417,9 @@ def rank_routes(
     search_from: str,
     search_to: str,
     search_time: str = "",
-    time_range: Optional[str] = None
+    time_range: Optional[str] = None,
+    limit: Optional[int] = None,
+    detailed: bool = True
 ) -> List[Dict]:
     """
     Rank and score all routes based on AI matching algorithm
@@ -374,6 +430,9 @@ def rank_routes(
         search_to: User's dropoff location
         search_time: User's preferred departure time
         time_range: Optional time range filter
+        limit: Return only the top N matches (all routes if None)
+        detailed: Attach the breakdown, reasons and confidence as well as the
+            score; pass False when only the ranking order is used
     
     Returns:
         List of routes sorted by match score (highest first) with AI match data
@@ -384,17 +443,40 @@ def rank_routes(
     - Popular routes for this route combination
     - Historical booking success rates
     """
-    scored_routes = []
-    
-    for route in routes:
-        # Calculate AI match score
-        match_data = calculate_route_match(
-            search_from,
-            search_to,
-            search_time,
-            time_range,
-            route
-        )
+    # Resolve the preferred time once rather than re-splitting time_range per route
+    if time_range and "-" in time_range:
+        range_start = time_range.split("-")[0].strip()
+        if range_start:
+            search_time, time_range = range_start, None
+    
+    # Score every route, but build the decorated match data (reason strings,
+    # rounded breakdown) only for the routes that make the returned top matches
+    scored_routes = [
+        (route, _score_route(search_from, search_to, search_time, time_range, route))
+        for route in routes
+    ]
+    
+    # Sort by AI score descending (the rounded score, as reported). With a limit
+    # only the top N are needed: nlargest keeps a heap of N instead of sorting
+    # everything, and orders ties the same way the stable sort does
+    def match_score(item):
+        return round(item[1][0], 2)
+    
+    if limit is not None:
+        scored_routes = heapq.nlargest(limit, scored_routes, key=match_score)
+    else:
+        scored_routes.sort(key=match_score, reverse=True)
+    
+    if not detailed:
+        ranked_routes = []
+        for route, scored in scored_routes:
+            route["aiScore"] = round(scored[0], 2)
+            ranked_routes.append(route)
+        return ranked_routes
+    
+    ranked_routes = []
+    for route, scored in scored_routes:
+        match_data = _match_details(scored)
         
         # Add match data to route
         route["aiScore"] = match_data["matchScore"]
@@ -402,9 +484,6 @@ def rank_routes(
         route["aiReasons"] = match_data["reasons"]
         route["aiConfidence"] = match_data["confidence"]
         
-        scored_routes.append(route)
-    
-    # Sort by AI score descending
-    scored_routes.sort(key=lambda x: x.get("aiScore", 0), reverse=True)
+        ranked_routes.append(route)
     
-    return scored_routes
+    return ranked_routes